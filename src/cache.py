@@ -0,0 +1,75 @@
+"""
+Caché en disco con TTL para el bot de trading en Hyperliquid.
+Permite reutilizar respuestas recientes de la API entre reinicios del bot
+o entre varios procesos que consultan la misma cuenta.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Any, Optional
+
+logger = logging.getLogger("cache")
+
+class DiskCache:
+    """Caché clave -> valor JSON en ficheros, con caducidad por fecha de modificación."""
+    
+    def __init__(self, cache_dir: str):
+        """
+        Inicializa la caché en disco.
+        
+        Args:
+            cache_dir: Directorio donde se guardan las entradas
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def _path(self, key: str) -> str:
+        """Ruta del fichero de una clave."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key: str, ttl: float) -> Optional[Any]:
+        """
+        Obtiene una entrada si existe y tiene menos de `ttl` segundos.
+        
+        Args:
+            key: Clave de la entrada
+            ttl: Antigüedad máxima en segundos
+        
+        Returns:
+            Valor guardado o None si no existe o ha caducado
+        """
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("No se pudo leer la caché %s: %s", key, e)
+            return None
+    
+    def set(self, key: str, value: Any) -> None:
+        """
+        Guarda una entrada de forma atómica (escritura temporal + rename).
+        
+        Args:
+            key: Clave de la entrada
+            value: Valor serializable a JSON
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("No se pudo guardar la caché %s: %s", key, e)
+            # No dejar ficheros temporales huérfanos en el directorio de caché
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -3,18 +3,118 @@ Módulo de conexión a Hyperliquid utilizando la biblioteca CCXT.
 Gestiona la autenticación y comunicación con la API de Hyperliquid a través de CCXT.
 """
 
+import asyncio
 import logging
+import math
+import threading
 import time
 import ccxt
-from typing import Dict, Any, Optional, List, Tuple
+import ccxt.pro as ccxtpro
+import numpy as np
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Any, Optional, List, Tuple, Callable
 import json
 
+try:
+    import orjson
+except ImportError:  # orjson es opcional; se usa json de la librería estándar
+    orjson = None
+
 logger = logging.getLogger("ccxt_connection")
 
+# Tamaños mínimos de orden por defecto si el mercado no los informa
+DEFAULT_MIN_ORDER_SIZES = {
+    "BTC": 0.001,  # 1 miliBTC
+    "ETH": 0.01,   # 10 miliETH
+    "SOL": 0.1,    # 0.1 SOL
+}
+
+# Antigüedad máxima (segundos) para reutilizar el último precio conocido
+PRICE_MAX_AGE = 1.0
+
+# Mapeo de intervalos del bot al formato de timeframe de CCXT
+_TIMEFRAME_MAP = {
+    "1m": "1m",
+    "5m": "5m",
+    "15m": "15m",
+    "30m": "30m",
+    "1h": "1h",
+    "4h": "4h",
+    "1d": "1d"
+}
+
+def _dumps_pretty(obj: Any) -> str:
+    """Serializa un objeto a JSON indentado, con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+    return json.dumps(obj, indent=2, default=str)
+
+# Intervalo (segundos) para reconciliar por REST las órdenes del stream websocket
+ORDERS_RESYNC_INTERVAL = 60.0
+
+# Columnas de las velas OHLCV devueltas por get_candles
+_OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+# Vigencia (segundos) de la instantánea de balance y posiciones de la cuenta
+STATE_SNAPSHOT_TTL = 0.5
+
+# Espaciado mínimo (ms) entre peticiones REST: ~20 peticiones/s permitidas por Hyperliquid
+RATE_LIMIT_MS = 50
+
+# Tamaño del pool de conexiones HTTP keep-alive hacia la API
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = 32
+
+# Conexiones ya creadas por (wallet, testnet), compartidas entre instancias del bot
+_INSTANCES: Dict[Tuple[str, bool], "CCXTHyperliquidConnection"] = {}
+_INSTANCES_LOCK = threading.Lock()
+
 class CCXTHyperliquidConnection:
     """Clase para gestionar la conexión a Hyperliquid utilizando CCXT."""
     
-    def __init__(self, wallet_address: str, private_key: str, testnet: bool = False):
+    @classmethod
+    def get_or_create(cls, wallet_address: str, private_key: str, testnet: bool = False,
+                      connection_limits: Optional[Dict[str, int]] = None) -> "CCXTHyperliquidConnection":
+        """
+        Devuelve la conexión existente para la wallet y red indicadas, o la crea.
+        Así el exchange de CCXT, su pool HTTP y los mercados cargados se reutilizan
+        si el bot se instancia varias veces en el mismo proceso.
+        
+        Args:
+            wallet_address: Dirección de la wallet
+            private_key: Clave privada para firmar transacciones
+            testnet: Si se debe usar testnet en lugar de mainnet
+            connection_limits: Tamaño del pool HTTP (solo se aplica al crear la conexión)
+            
+        Returns:
+            Conexión compartida
+            
+        Raises:
+            ValueError: Si ya existe una conexión para la cuenta con otra clave privada
+        """
+        key = (wallet_address.lower(), testnet)
+        with _INSTANCES_LOCK:
+            connection = _INSTANCES.get(key)
+            if connection is None:
+                connection = cls(wallet_address, private_key, testnet, connection_limits)
+                _INSTANCES[key] = connection
+                return connection
+            
+            if connection.private_key != private_key:
+                raise ValueError(
+                    f"Ya existe una conexión para la cuenta {wallet_address} con otra clave privada"
+                )
+            if connection_limits and connection_limits != connection.connection_limits:
+                logger.warning("La conexión existente para %s ya tiene su pool HTTP (%s); se ignora %s",
+                               wallet_address, connection.connection_limits, connection_limits)
+            logger.info("Reutilizando la conexión CCXT existente para la cuenta %s", wallet_address)
+            return connection
+    
+    def __init__(self, wallet_address: str, private_key: str, testnet: bool = False,
+                 connection_limits: Optional[Dict[str, int]] = None):
         """
         Inicializa la conexión a Hyperliquid utilizando CCXT.
         
@@ -22,6 +122,8 @@ class CCXTHyperliquidConnection:
             wallet_address: Dirección de la wallet
             private_key: Clave privada para firmar transacciones
             testnet: Si se debe usar testnet en lugar de mainnet
+            connection_limits: Tamaño del pool HTTP ('pool_connections', 'pool_maxsize');
+                por defecto HTTP_POOL_CONNECTIONS y HTTP_POOL_MAXSIZE
         """
         self.wallet_address = wallet_address
         self.private_key = private_key
@@ -32,6 +134,7 @@ class CCXTHyperliquidConnection:
             'walletAddress': wallet_address,
             'privateKey': private_key,
             'enableRateLimit': True,
+            'rateLimit': RATE_LIMIT_MS,
             'options': {
                 'defaultType': 'swap',
                 'defaultSlippage': 0.05  # 5% de slippage máximo
@@ -42,34 +145,124 @@ class CCXTHyperliquidConnection:
         if testnet:
             self.exchange.set_sandbox_mode(True)
         
+        # Reutilizar conexiones TLS: pool keep-alive dimensionado para peticiones en paralelo
+        # (sin reintentos a nivel de urllib3; CCXT gestiona sus propios errores)
+        limits = connection_limits or {}
+        self.connection_limits = limits
+        self.exchange.session.mount('https://', HTTPAdapter(
+            pool_connections=limits.get('pool_connections', HTTP_POOL_CONNECTIONS),
+            pool_maxsize=limits.get('pool_maxsize', HTTP_POOL_MAXSIZE),
+            max_retries=0
+        ))
+        
         # Símbolo para BTC
         self.btc_symbol = 'BTC/USDC:USDC'
         
-        logger.info(f"Conexión CCXT inicializada para la cuenta {wallet_address}")
+        # Parámetros para las consultas de cuenta (/info exige la dirección del usuario)
+        self._info_params = {'user': wallet_address.lower()}
+        
+        # Pool de hilos para lanzar en paralelo peticiones REST independientes
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ccxt_io")
+        
+        # Caché de tamaños mínimos de orden por activo (estáticos durante la sesión)
+        self._min_size_cache: Dict[str, float] = {}
         
-        # Verificar conexión
-        self.verify_connection()
+        # Último precio conocido por símbolo: símbolo -> (precio, instante monotónico)
+        self._last_price: Dict[str, Tuple[float, float]] = {}
+        
+        # Caché de símbolos CCXT por activo
+        self._symbol_cache: Dict[str, str] = {}
+        
+        # Incremento mínimo de tamaño (step) por activo, según los mercados cargados
+        self._amount_step: Dict[str, float] = {}
+        
+        # Instantánea compartida de (balance, posiciones): (instante monotónico, datos)
+        self._state_cache: Tuple[float, Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]] = (0.0, None)
+        
+        # Espejo en memoria de las órdenes abiertas, alimentado por websocket
+        self._open_orders: Dict[str, Dict[str, Any]] = {}
+        self._orders_lock = threading.Lock()
+        self._orders_live = False
+        self._stream_thread = None
+        self._stream_loop = None
+        self._stream_ws = None
+        self._stream_stop = threading.Event()
+        
+        # Usuarios del stream (bots que comparten la conexión); se detiene al llegar a 0
+        self._stream_users = 0
+        self._stream_users_lock = threading.Lock()
+        
+        # Funciones a notificar cuando el stream recibe cambios en las órdenes
+        self._order_listeners: List[Callable[[], None]] = []
+        
+        logger.info("Conexión CCXT inicializada para la cuenta %s", wallet_address)
+        
+        # Verificar conexión y cargar mercados en paralelo
+        self._bootstrap()
+    
+    def _bootstrap(self) -> None:
+        """
+        Ejecuta en paralelo las peticiones de arranque: verificación de balance
+        y carga de mercados (con precálculo de tamaños mínimos).
+        """
+        verify_future = self._executor.submit(self.verify_connection)
+        markets_future = self._executor.submit(self.reload_markets)
+        
+        # Ambos métodos gestionan sus propios errores
+        verify_future.result()
+        markets_future.result()
+    
+    def reload_markets(self) -> None:
+        """
+        Recarga la información de mercados y recalcula las cachés derivadas.
+        """
+        self._min_size_cache.clear()
+        self._amount_step.clear()
+        try:
+            self.exchange.load_markets(reload=True)
+        except Exception as e:
+            logger.error("Error al cargar mercados: %s", e)
+            return
+        
+        for asset in DEFAULT_MIN_ORDER_SIZES:
+            self.get_min_order_size(asset)
+    
+    def _sym(self, asset: str) -> str:
+        """
+        Devuelve el símbolo CCXT de un activo (ej. "BTC" -> "BTC/USDC:USDC").
+        
+        Args:
+            asset: Símbolo del activo
+            
+        Returns:
+            Símbolo del par perpetuo en USDC
+        """
+        symbol = self._symbol_cache.get(asset)
+        if symbol is None:
+            symbol = self._symbol_cache[asset] = f"{asset}/USDC:USDC"
+        return symbol
     
     def verify_connection(self) -> None:
         """Verifica que la conexión sea válida y que la cuenta tenga fondos."""
         try:
             # Obtener balance
-            balance = self.exchange.fetch_balance()
+            balance = self.exchange.fetch_balance(self._info_params)
             
-            # Registrar la estructura completa para depuración
-            logger.debug(f"Estructura completa de balance: {json.dumps(balance, indent=2)}")
+            # Registrar la estructura completa para depuración (solo si DEBUG está activo)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Estructura completa de balance: %s", _dumps_pretty(balance))
             
             # Verificar si hay fondos en la cuenta
             total_balance = balance.get('total', {})
             usdc_balance = total_balance.get('USDC', 0)
             
             if usdc_balance > 0:
-                logger.info(f"Conexión verificada. Balance USDC: {usdc_balance}")
+                logger.info("Conexión verificada. Balance USDC: %s", usdc_balance)
             else:
-                logger.warning(f"La cuenta {self.wallet_address} podría no tener fondos suficientes.")
+                logger.warning("La cuenta %s podría no tener fondos suficientes.", self.wallet_address)
                 
         except Exception as e:
-            logger.error(f"Error al verificar la conexión: {str(e)}")
+            logger.error("Error al verificar la conexión: %s", e)
             # No lanzar excepción para permitir que el bot continúe funcionando
     
     def get_market_price(self, symbol: str = None) -> float:
@@ -77,23 +270,69 @@ class CCXTHyperliquidConnection:
         Obtiene el precio actual de mercado para un símbolo.
         
         Args:
-            symbol: Símbolo del par de trading (por defecto, BTC/USDC:USDC)
+            symbol: Símbolo del par de trading o activo (ej. "BTC"; por defecto, BTC/USDC:USDC)
             
         Returns:
             Precio actual de mercado
         """
         if symbol is None:
             symbol = self.btc_symbol
+        elif '/' not in symbol:
+            symbol = self._sym(symbol)
+        
+        # Reutilizar el último precio si es suficientemente reciente
+        cached = self._last_price.get(symbol)
+        if cached is not None and time.monotonic() - cached[1] <= PRICE_MAX_AGE:
+            return cached[0]
         
         try:
             ticker = self.exchange.fetch_ticker(symbol)
             price = ticker['last']
-            logger.info(f"Precio de mercado para {symbol}: {price}")
+            self._last_price[symbol] = (price, time.monotonic())
+            logger.info("Precio de mercado para %s: %s", symbol, price)
             return price
         except Exception as e:
-            logger.error(f"Error al obtener precio de mercado para {symbol}: {str(e)}")
+            logger.error("Error al obtener precio de mercado para %s: %s", symbol, e)
             return 0.0
     
+    def _snapshot(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Obtiene balance y posiciones de la cuenta, reutilizando la última
+        instantánea si tiene menos de STATE_SNAPSHOT_TTL segundos.
+        
+        Returns:
+            Tupla (balance, posiciones)
+        """
+        fetched_at, snapshot = self._state_cache
+        now = time.monotonic()
+        if snapshot is not None and now - fetched_at < STATE_SNAPSHOT_TTL:
+            return snapshot
+        
+        # Lanzar balance y posiciones abiertas en paralelo
+        balance_future = self._executor.submit(self.exchange.fetch_balance, self._info_params)
+        positions_future = self._executor.submit(self.exchange.fetch_positions, None, self._info_params)
+        
+        snapshot = (balance_future.result(), positions_future.result())
+        self._state_cache = (now, snapshot)
+        return snapshot
+    
+    def get_positions(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene las posiciones de la cuenta: las de la instantánea si es reciente,
+        o una consulta solo de posiciones (con los parámetros de usuario de /info).
+        
+        Returns:
+            Lista de posiciones en formato CCXT
+        """
+        fetched_at, snapshot = self._state_cache
+        if snapshot is not None and time.monotonic() - fetched_at < STATE_SNAPSHOT_TTL:
+            return snapshot[1]
+        return self.exchange.fetch_positions(None, self._info_params)
+    
+    def _invalidate_snapshot(self) -> None:
+        """Descarta la instantánea de cuenta tras crear o cancelar órdenes."""
+        self._state_cache = (0.0, None)
+    
     def get_user_state(self) -> Dict[str, Any]:
         """
         Obtiene el estado actual del usuario.
@@ -102,14 +341,18 @@ class CCXTHyperliquidConnection:
             Diccionario con el estado del usuario
         """
         try:
-            # Obtener balance
-            balance = self.exchange.fetch_balance()
-            
-            # Obtener posiciones abiertas
-            positions = self.exchange.fetch_positions()
+            # Lanzar las órdenes abiertas en paralelo con la instantánea de cuenta
+            # (las órdenes salen del espejo websocket si el stream está activo)
+            open_orders_future = None
+            if self._orders_live:
+                with self._orders_lock:
+                    open_orders = list(self._open_orders.values())
+            else:
+                open_orders_future = self._executor.submit(self.exchange.fetch_open_orders, None, None, None, self._info_params)
             
-            # Obtener órdenes abiertas
-            open_orders = self.exchange.fetch_open_orders()
+            balance, positions = self._snapshot()
+            if open_orders_future is not None:
+                open_orders = open_orders_future.result()
             
             # Construir un estado similar al de la API original de Hyperliquid
             user_state = {
@@ -124,9 +367,145 @@ class CCXTHyperliquidConnection:
             
             return user_state
         except Exception as e:
-            logger.error(f"Error al obtener estado del usuario: {str(e)}")
+            logger.error("Error al obtener estado del usuario: %s", e)
             return {}
     
+    def add_order_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Registra una función que se llama (desde el hilo del stream) cada vez
+        que llegan actualizaciones de órdenes por websocket.
+        
+        Args:
+            listener: Función sin argumentos; debe ser rápida y no bloquear
+        """
+        self._order_listeners.append(listener)
+    
+    def remove_order_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Elimina una función registrada con add_order_listener (si lo estaba).
+        
+        Args:
+            listener: Función registrada previamente
+        """
+        try:
+            self._order_listeners.remove(listener)
+        except ValueError:
+            pass
+    
+    def start_user_stream(self) -> None:
+        """
+        Arranca en segundo plano el stream websocket de órdenes del usuario.
+        Mientras está activo, get_user_state obtiene las órdenes abiertas desde memoria.
+        Cada llamada debe emparejarse con una llamada a stop_user_stream.
+        """
+        with self._stream_users_lock:
+            self._stream_users += 1
+            if self._stream_thread is not None and self._stream_thread.is_alive():
+                return
+            
+            self._stream_stop.clear()
+            self._stream_thread = threading.Thread(
+                target=self._run_user_stream,
+                name="UserStream",
+                daemon=True
+            )
+            self._stream_thread.start()
+        logger.info("Stream websocket de órdenes iniciado")
+    
+    def stop_user_stream(self) -> None:
+        """
+        Libera el stream websocket de órdenes. Solo se detiene cuando ya no lo usa
+        ningún bot de la conexión; entonces las consultas vuelven a ser REST.
+        """
+        with self._stream_users_lock:
+            if self._stream_users > 0:
+                self._stream_users -= 1
+            if self._stream_users > 0:
+                logger.info("Stream websocket de órdenes sigue activo (%s usuario(s))", self._stream_users)
+                return
+            self._stop_user_stream()
+    
+    def _stop_user_stream(self) -> None:
+        """Detiene el hilo del stream websocket de órdenes."""
+        self._stream_stop.set()
+        self._orders_live = False
+        
+        # Cerrar el websocket desde su propio event loop para desbloquear watch_orders
+        loop, ws = self._stream_loop, self._stream_ws
+        if loop is not None and ws is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(ws.close(), loop)
+        
+        if self._stream_thread is not None:
+            self._stream_thread.join(timeout=5.0)
+            self._stream_thread = None
+        logger.info("Stream websocket de órdenes detenido")
+    
+    def _run_user_stream(self) -> None:
+        """Punto de entrada del hilo del stream: ejecuta su propio event loop."""
+        try:
+            asyncio.run(self._user_stream())
+        except Exception as e:
+            logger.error("Error en el stream websocket de órdenes: %s", e)
+        finally:
+            self._orders_live = False
+            self._stream_loop = None
+            self._stream_ws = None
+    
+    async def _user_stream(self) -> None:
+        """
+        Mantiene el espejo de órdenes abiertas con eventos websocket y lo
+        reconcilia periódicamente por REST. Reconecta con backoff exponencial.
+        """
+        self._stream_loop = asyncio.get_running_loop()
+        ws = ccxtpro.hyperliquid({
+            'walletAddress': self.wallet_address,
+            'privateKey': self.private_key,
+            'options': {
+                'defaultType': 'swap'
+            }
+        })
+        if self.testnet:
+            ws.set_sandbox_mode(True)
+        self._stream_ws = ws
+        
+        backoff = 1.0
+        last_sync = 0.0
+        try:
+            while not self._stream_stop.is_set():
+                try:
+                    # Reconciliar por REST al conectar y cada ORDERS_RESYNC_INTERVAL
+                    if not self._orders_live or time.monotonic() - last_sync > ORDERS_RESYNC_INTERVAL:
+                        open_orders = await asyncio.to_thread(
+                            self.exchange.fetch_open_orders, None, None, None, self._info_params
+                        )
+                        with self._orders_lock:
+                            self._open_orders = {order['id']: order for order in open_orders}
+                        last_sync = time.monotonic()
+                        self._orders_live = True
+                        backoff = 1.0
+                    
+                    orders = await ws.watch_orders(None, None, None, self._info_params)
+                    with self._orders_lock:
+                        for order in orders:
+                            if order.get('status') == 'open':
+                                self._open_orders[order['id']] = order
+                            else:
+                                self._open_orders.pop(order['id'], None)
+                    
+                    # Una orden ejecutada o cancelada puede cambiar las posiciones
+                    self._invalidate_snapshot()
+                    for listener in list(self._order_listeners):
+                        listener()
+                except Exception as e:
+                    self._orders_live = False
+                    if self._stream_stop.is_set():
+                        break
+                    logger.warning("Stream de órdenes interrumpido, reintentando en %.0fs: %s", backoff, e)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+        finally:
+            await ws.close()
+    
     def get_market_data(self, asset: str) -> Dict[str, Any]:
         """
         Obtiene datos de mercado para un activo.
@@ -137,34 +516,80 @@ class CCXTHyperliquidConnection:
         Returns:
             Diccionario con datos de mercado
         """
-        symbol = f"{asset}/USDC:USDC"
+        symbol = self._sym(asset)
         
         try:
             # Obtener ticker
             ticker = self.exchange.fetch_ticker(symbol)
+            market_data = self._build_market_data(asset, symbol, ticker)
             
-            # Construir datos de mercado similares a la API original
-            market_data = {
-                "name": asset,
-                "midPrice": ticker['last'],
-                "markPrice": ticker['last'],
-                "indexPrice": ticker['last'],
-                "lastTradedPrice": ticker['last'],
-                "bid": ticker['bid'],
-                "ask": ticker['ask'],
-                "volume24h": ticker['quoteVolume'],
-                "openInterest": ticker.get('info', {}).get('openInterest', 0)
-            }
-            
-            logger.info(f"Datos de mercado obtenidos para {asset}")
+            logger.info("Datos de mercado obtenidos para %s", asset)
             return market_data
         except Exception as e:
-            logger.error(f"Error al obtener datos de mercado para {asset}: {str(e)}")
+            logger.error("Error al obtener datos de mercado para %s: %s", asset, e)
             return {}
     
-    def get_candles(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+    def get_market_data_bulk(self, assets: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        Obtiene datos OHLC para un activo.
+        Obtiene datos de mercado para varios activos con una sola petición.
+        
+        Args:
+            assets: Lista de símbolos de activos (ej. ["BTC", "ETH"])
+            
+        Returns:
+            Diccionario activo -> datos de mercado (solo activos con ticker)
+        """
+        if not assets:
+            return {}
+        
+        symbols = {self._sym(asset): asset for asset in assets}
+        
+        try:
+            tickers = self.exchange.fetch_tickers(list(symbols))
+            
+            result = {}
+            for symbol, asset in symbols.items():
+                ticker = tickers.get(symbol)
+                if ticker:
+                    result[asset] = self._build_market_data(asset, symbol, ticker)
+            
+            logger.info("Datos de mercado obtenidos para %s activos", len(result))
+            return result
+        except Exception as e:
+            logger.error("Error al obtener datos de mercado para %s: %s", assets, e)
+            return {}
+    
+    def _build_market_data(self, asset: str, symbol: str, ticker: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convierte un ticker de CCXT al formato de datos de mercado del bot.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            symbol: Símbolo CCXT del par
+            ticker: Ticker devuelto por CCXT
+            
+        Returns:
+            Diccionario con datos de mercado
+        """
+        if ticker['last']:
+            self._last_price[symbol] = (ticker['last'], time.monotonic())
+        
+        # Construir datos de mercado similares a la API original
+        return {
+            "name": asset,
+            "midPrice": ticker['last'],
+            "markPrice": ticker['last'],
+            "indexPrice": ticker['last'],
+            "lastTradedPrice": ticker['last'],
+            "bid": ticker['bid'],
+            "ask": ticker['ask'],
+            "volume24h": ticker['quoteVolume'],
+            "openInterest": ticker.get('info', {}).get('openInterest', 0)
+        }
+    
+    def _fetch_ohlcv(self, asset: str, interval: str, limit: int) -> List[List[float]]:
+        """
+        Descarga las velas OHLCV en bruto desde CCXT.
         
         Args:
             asset: Símbolo del activo (ej. "BTC")
@@ -172,53 +597,130 @@ class CCXTHyperliquidConnection:
             limit: Número máximo de velas
             
         Returns:
-            Lista de velas OHLC
+            Lista de filas [timestamp, open, high, low, close, volume]
         """
-        symbol = f"{asset}/USDC:USDC"
+        symbol = self._sym(asset)
         
         # Mapear el intervalo al formato de CCXT
-        timeframe_map = {
-            "1m": "1m",
-            "5m": "5m",
-            "15m": "15m",
-            "30m": "30m",
-            "1h": "1h",
-            "4h": "4h",
-            "1d": "1d"
-        }
+        timeframe = _TIMEFRAME_MAP.get(interval, "5m")
         
-        timeframe = timeframe_map.get(interval, "5m")
+        return self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+    
+    def get_candles(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Obtiene datos OHLC para un activo.
         
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            interval: Intervalo de tiempo (ej. "5m", "1h", "1d")
+            limit: Número máximo de velas
+            
+        Returns:
+            Lista de velas OHLC
+        """
         try:
             # Obtener velas OHLC
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = self._fetch_ohlcv(asset, interval, limit)
             
-            # Convertir al formato esperado por el bot
-            candles = []
-            for candle in ohlcv:
-                timestamp, open_price, high, low, close, volume = candle
-                candles.append({
-                    "timestamp": timestamp,
-                    "open": open_price,
-                    "high": high,
-                    "low": low,
-                    "close": close,
-                    "volume": volume
-                })
-            
-            logger.info(f"Obtenidas {len(candles)} velas para {asset} (intervalo: {interval})")
+            # Convertir al formato esperado por el bot (conversión vectorizada)
+            candles = pd.DataFrame(ohlcv, columns=_OHLCV_COLUMNS).to_dict('records')
+            
+            logger.info("Obtenidas %s velas para %s (intervalo: %s)", len(candles), asset, interval)
             return candles
         except Exception as e:
-            logger.error(f"Error al obtener velas para {asset}: {str(e)}")
+            logger.error("Error al obtener velas para %s: %s", asset, e)
             return []
     
-    def calculate_order_size(self, usd_amount: float, price: float) -> float:
+    def get_candle_arrays(self, asset: str, interval: str = "5m", limit: int = 100) -> Dict[str, np.ndarray]:
+        """
+        Obtiene datos OHLC para un activo en formato columnar (un array por campo).
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            interval: Intervalo de tiempo (ej. "5m", "1h", "1d")
+            limit: Número máximo de velas
+            
+        Returns:
+            Diccionario con arrays de NumPy: timestamp, open, high, low, close, volume
+            (vacío si hay error)
+        """
+        try:
+            ohlcv = self._fetch_ohlcv(asset, interval, limit)
+            arr = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+            
+            logger.info("Obtenidas %s velas para %s (intervalo: %s)", len(arr), asset, interval)
+            return {
+                "timestamp": arr[:, 0].astype(np.int64),
+                "open": arr[:, 1],
+                "high": arr[:, 2],
+                "low": arr[:, 3],
+                "close": arr[:, 4],
+                "volume": arr[:, 5]
+            }
+        except Exception as e:
+            logger.error("Error al obtener velas para %s: %s", asset, e)
+            return {}
+    
+    def get_candles_bulk(self, assets: List[str], interval: str = "5m", limit: int = 100) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Obtiene datos OHLC para varios activos en paralelo.
+        
+        Args:
+            assets: Lista de símbolos de activos (ej. ["BTC", "ETH"])
+            interval: Intervalo de tiempo (ej. "5m", "1h", "1d")
+            limit: Número máximo de velas
+            
+        Returns:
+            Diccionario activo -> lista de velas OHLC
+        """
+        # El tamaño del pool limita las peticiones simultáneas
+        futures = {
+            asset: self._executor.submit(self.get_candles, asset, interval, limit)
+            for asset in assets
+        }
+        return {asset: future.result() for asset, future in futures.items()}
+    
+    def get_amount_step(self, asset: str) -> Optional[float]:
+        """
+        Obtiene el incremento mínimo de tamaño de orden de un activo.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            
+        Returns:
+            Step de tamaño o None si el mercado no lo informa
+        """
+        step = self._amount_step.get(asset)
+        if step is not None:
+            return step
+        
+        try:
+            market = self.exchange.market(self._sym(asset))
+            precision = market.get('precision', {}).get('amount')
+            if precision is None:
+                return None
+            
+            # En modo TICK_SIZE la precisión ya es el step; si no, son decimales
+            if self.exchange.precisionMode == ccxt.TICK_SIZE:
+                step = float(precision)
+            else:
+                step = 10.0 ** -int(precision)
+            
+            self._amount_step[asset] = step
+            return step
+        except Exception as e:
+            logger.error("Error al obtener step de tamaño para %s: %s", asset, e)
+            return None
+    
+    def calculate_order_size(self, usd_amount: float, price: float, asset: str = None) -> float:
         """
         Calcula el tamaño de la orden en base al monto en USD y el precio.
         
         Args:
             usd_amount: Monto en USD a utilizar
             price: Precio actual del activo
+            asset: Símbolo del activo (opcional). Si se indica, el tamaño se
+                trunca al step de tamaño del mercado.
             
         Returns:
             Tamaño de la orden
@@ -226,11 +728,16 @@ class CCXTHyperliquidConnection:
         if price <= 0:
             return 0.0
         
-        # Calcular tamaño y redondear a 6 decimales
-        size = round(usd_amount / price, 6)
-        return size
+        step = self.get_amount_step(asset) if asset else None
+        if not step:
+            # Calcular tamaño y redondear a 6 decimales
+            return round(usd_amount / price, 6)
+        
+        # Truncar a un múltiplo entero del step para evitar rechazos del exchange
+        steps = math.floor(usd_amount / price / step + 1e-9)
+        return float(Decimal(steps) * Decimal(str(step)))
     
-    def place_market_order(self, asset: str, is_buy: bool, sz: float) -> Dict[str, Any]:
+    def place_market_order(self, asset: str, is_buy: bool, sz: float, price: float = None) -> Dict[str, Any]:
         """
         Coloca una orden de mercado.
         
@@ -238,34 +745,40 @@ class CCXTHyperliquidConnection:
             asset: Símbolo del activo (ej. "BTC")
             is_buy: True para compra, False para venta
             sz: Tamaño de la orden
+            price: Precio de referencia ya conocido por el llamador (opcional).
+                Si no se indica, se consulta el precio de mercado.
             
         Returns:
             Resultado de la operación
         """
-        symbol = f"{asset}/USDC:USDC"
+        symbol = self._sym(asset)
         side = "buy" if is_buy else "sell"
         
         try:
-            # Obtener precio actual para el cálculo del slippage
-            price = self.get_market_price(symbol)
+            # Obtener precio actual para el cálculo del slippage (si no se proporcionó)
+            if price is None:
+                price = self.get_market_price(symbol)
             if price <= 0:
                 return {"status": "error", "error": "No se pudo obtener un precio válido para la orden"}
             
-            logger.info(f"Precio de mercado para {symbol}: {price}")
-            
             # Validar y ajustar tamaño de orden
             is_valid, adjusted_size = self.validate_order_size(asset, sz)
             if not is_valid:
-                logger.warning(f"Tamaño de orden ajustado de {sz} a {adjusted_size}")
+                logger.warning("Tamaño de orden ajustado de %s a %s", sz, adjusted_size)
                 sz = adjusted_size
             
-            # Parámetros adicionales para la orden
-            params = {}
+            # Hyperliquid no tiene órdenes de mercado reales: enviar una orden límite IOC
+            # con el precio desplazado por el slippage máximo permitido
+            slippage = self.exchange.options.get('defaultSlippage', 0.05)
+            limit_px = price * (1 + slippage) if is_buy else price * (1 - slippage)
+            limit_px = float(self.exchange.price_to_precision(symbol, limit_px))
+            
+            params = {'timeInForce': 'Ioc'}
             
-            # CORREGIDO: Colocar orden de mercado con el precio explícito para el cálculo del slippage
-            order = self.exchange.create_order(symbol, 'market', side, abs(sz), price=price, params=params)
+            order = self.exchange.create_order(symbol, 'limit', side, abs(sz), limit_px, params)
+            self._invalidate_snapshot()
             
-            logger.info(f"Orden de mercado colocada: {side} {abs(sz)} {asset} a ~${price:.2f}")
+            logger.info("Orden de mercado colocada: %s %s %s a ~$%.2f (límite IOC: %s)", side, abs(sz), asset, price, limit_px)
             
             return {
                 "status": "ok",
@@ -284,7 +797,7 @@ class CCXTHyperliquidConnection:
                 }
             }
         except Exception as e:
-            logger.error(f"Error al colocar orden de mercado: {str(e)}")
+            logger.error("Error al colocar orden de mercado: %s", e)
             return {"status": "error", "error": str(e)}
     
     def place_order(self, asset: str, is_buy: bool, sz: float, limit_px: float, order_type: Dict[str, Any] = None, reduce_only: bool = False) -> Dict[str, Any]:
@@ -302,7 +815,7 @@ class CCXTHyperliquidConnection:
         Returns:
             Resultado de la operación
         """
-        symbol = f"{asset}/USDC:USDC"
+        symbol = self._sym(asset)
         side = "buy" if is_buy else "sell"
         
         try:
@@ -313,8 +826,9 @@ class CCXTHyperliquidConnection:
             
             # Colocar orden límite
             order = self.exchange.create_order(symbol, 'limit', side, sz, limit_px, params)
+            self._invalidate_snapshot()
             
-            logger.info(f"Orden límite colocada: {asset}, {'compra' if is_buy else 'venta'}, {sz}, precio: {limit_px}")
+            logger.info("Orden límite colocada: %s, %s, %s, precio: %s", asset, 'compra' if is_buy else 'venta', sz, limit_px)
             
             return {
                 "status": "ok",
@@ -333,7 +847,7 @@ class CCXTHyperliquidConnection:
                 }
             }
         except Exception as e:
-            logger.error(f"Error al colocar orden límite: {str(e)}")
+            logger.error("Error al colocar orden límite: %s", e)
             return {"status": "error", "error": str(e)}
     
     def cancel_order(self, asset: str, order_id: str) -> Dict[str, Any]:
@@ -347,17 +861,18 @@ class CCXTHyperliquidConnection:
         Returns:
             Resultado de la cancelación
         """
-        symbol = f"{asset}/USDC:USDC"
+        symbol = self._sym(asset)
         
         try:
             # Cancelar orden
             result = self.exchange.cancel_order(order_id, symbol)
+            self._invalidate_snapshot()
             
-            logger.info(f"Orden {order_id} cancelada exitosamente")
+            logger.info("Orden %s cancelada exitosamente", order_id)
             
             return {"status": "ok", "response": result}
         except Exception as e:
-            logger.error(f"Error al cancelar orden {order_id}: {str(e)}")
+            logger.error("Error al cancelar orden %s: %s", order_id, e)
             return {"status": "error", "error": str(e)}
     
     def get_order_status(self, asset: str, order_id: str) -> Dict[str, Any]:
@@ -371,7 +886,7 @@ class CCXTHyperliquidConnection:
         Returns:
             Estado de la orden
         """
-        symbol = f"{asset}/USDC:USDC"
+        symbol = self._sym(asset)
         
         try:
             # Obtener estado de la orden
@@ -396,28 +911,29 @@ class CCXTHyperliquidConnection:
             
             return status
         except Exception as e:
-            logger.error(f"Error al obtener estado de orden {order_id}: {str(e)}")
+            logger.error("Error al obtener estado de orden %s: %s", order_id, e)
             return {}
     
-    def get_account_summary(self) -> Dict[str, Any]:
+    def get_account_summary(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
-        Obtiene un resumen de la cuenta.
+        Obtiene un resumen de la cuenta (desde la instantánea compartida si es reciente).
+        
+        Args:
+            force_refresh: Descartar la instantánea y consultar la API
         
         Returns:
             Diccionario con resumen de la cuenta
         """
         try:
-            # Obtener balance
-            balance = self.exchange.fetch_balance()
+            if force_refresh:
+                self._invalidate_snapshot()
+            balance, positions = self._snapshot()
             
             # Obtener valores relevantes
             total_usdc = balance.get('total', {}).get('USDC', 0)
             free_usdc = balance.get('free', {}).get('USDC', 0)
             used_usdc = balance.get('used', {}).get('USDC', 0)
             
-            # Obtener posiciones abiertas
-            positions = self.exchange.fetch_positions()
-            
             return {
                 "total_capital": total_usdc,
                 "available_capital": free_usdc,
@@ -425,7 +941,7 @@ class CCXTHyperliquidConnection:
                 "positions": positions
             }
         except Exception as e:
-            logger.error(f"Error al obtener resumen de cuenta: {str(e)}")
+            logger.error("Error al obtener resumen de cuenta: %s", e)
             return {
                 "total_capital": 0,
                 "available_capital": 0,
@@ -443,7 +959,11 @@ class CCXTHyperliquidConnection:
         Returns:
             Tamaño mínimo de orden
         """
-        symbol = f"{asset}/USDC:USDC"
+        cached_size = self._min_size_cache.get(asset)
+        if cached_size is not None:
+            return cached_size
+        
+        symbol = self._sym(asset)
         
         try:
             # Obtener información del mercado
@@ -456,28 +976,20 @@ class CCXTHyperliquidConnection:
             
             # CORREGIDO: Verificar que min_amount no sea None antes de comparar
             if min_amount is not None and min_amount > 0:
-                logger.info(f"Tamaño mínimo de orden para {asset}: {min_amount}")
+                logger.info("Tamaño mínimo de orden para %s: %s", asset, min_amount)
+                self._min_size_cache[asset] = float(min_amount)
                 return float(min_amount)
             
             # Si no se encuentra, usar valores predeterminados
-            default_min_sizes = {
-                "BTC": 0.001,  # 1 miliBTC
-                "ETH": 0.01,   # 10 miliETH
-                "SOL": 0.1,    # 0.1 SOL
-            }
-            min_size = default_min_sizes.get(asset, 0.01)
-            logger.warning(f"No se pudo determinar el tamaño mínimo para {asset}. Usando valor predeterminado: {min_size}")
+            min_size = DEFAULT_MIN_ORDER_SIZES.get(asset, 0.01)
+            logger.warning("No se pudo determinar el tamaño mínimo para %s. Usando valor predeterminado: %s", asset, min_size)
+            self._min_size_cache[asset] = min_size
             return min_size
             
         except Exception as e:
-            logger.error(f"Error al obtener tamaño mínimo para {asset}: {str(e)}")
-            # Valores predeterminados seguros
-            default_min_sizes = {
-                "BTC": 0.001,  # 1 miliBTC
-                "ETH": 0.01,   # 10 miliETH
-                "SOL": 0.1,    # 0.1 SOL
-            }
-            return default_min_sizes.get(asset, 0.01)
+            logger.error("Error al obtener tamaño mínimo para %s: %s", asset, e)
+            # Valores predeterminados seguros (sin cachear: el error puede ser transitorio)
+            return DEFAULT_MIN_ORDER_SIZES.get(asset, 0.01)
     
     def validate_order_size(self, asset: str, size: float) -> Tuple[bool, float]:
         """
@@ -493,9 +1005,9 @@ class CCXTHyperliquidConnection:
         min_size = self.get_min_order_size(asset)
         
         if abs(size) < min_size:
-            logger.warning(f"Tamaño de orden {size} para {asset} es menor que el mínimo {min_size}. Ajustando al mínimo.")
+            logger.warning("Tamaño de orden %s para %s es menor que el mínimo %s. Ajustando al mínimo.", size, asset, min_size)
             # Mantener el signo original (para posiciones cortas)
-            adjusted_size = min_size if size >= 0 else -min_size
+            adjusted_size = math.copysign(min_size, size if size != 0 else 1.0)
             return False, adjusted_size
         
         return True, size
@@ -4,57 +4,410 @@ Implementa Hyperliquid como fuente principal y Binance como fallback.
 """
 
 import os
-import sys
+import asyncio
 import time
-import json
 import logging
-import requests
+import math
+import threading
+import functools
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
 import pandas as pd
 import ccxt
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime, timedelta
+import ccxt.pro as ccxtpro
+from typing import Dict, Any, List, Optional, Tuple, Callable
 
 # Configurar logging
 logger = logging.getLogger("ccxt_data_provider")
 
+# Columnas de las velas OHLCV
+OHLCV_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+# Límites de las cachés LRU
+MAX_CANDLES_ENTRIES = 64
+MAX_CANDLES_BYTES = 64 * 1024 * 1024
+MAX_PRICE_ENTRIES = 256
+
+# Mapeo de intervalos al formato de CCXT
+_TIMEFRAME_MAP = {
+    "1m": "1m",
+    "5m": "5m",
+    "15m": "15m",
+    "30m": "30m",
+    "1h": "1h",
+    "4h": "4h",
+    "1d": "1d"
+}
+
+@functools.lru_cache(maxsize=256)
+def _hl_symbol(asset: str) -> str:
+    """Símbolo CCXT del perpetuo de Hyperliquid para un activo (ej. "BTC/USDC:USDC")."""
+    return f"{asset}/USDC:USDC"
+
+@functools.lru_cache(maxsize=256)
+def _binance_symbol(asset: str) -> str:
+    """Símbolo CCXT del spot de Binance para un activo (ej. "BTC/USDT")."""
+    return f"{asset}/USDT"
+
+# Espera máxima (segundos) a Hyperliquid antes de recurrir a Binance
+PRIMARY_TIMEOUT = 5.0
+
+# Decimales de tamaño por defecto si no se pueden leer del mercado
+DEFAULT_SZ_DECIMALS = {
+    "BTC": 3,  # 0.001
+    "ETH": 2,  # 0.01
+    "SOL": 1,  # 0.1
+}
+
+# Potencias de 10 para cuantizar tamaños (0 a 8 decimales)
+_POW10 = tuple(10 ** i for i in range(9))
+
+def _floor_to_decimals(size: float, decimals: int) -> float:
+    """
+    Trunca un tamaño hacia cero al número de decimales indicado.
+    
+    Args:
+        size: Tamaño original (puede ser negativo)
+        decimals: Número de decimales (entre 0 y 8)
+        
+    Returns:
+        Tamaño truncado, nunca mayor en valor absoluto que el original
+    """
+    q = _POW10[decimals]
+    # El épsilon absorbe errores binarios como 0.29 * 100 = 28.999999999999996
+    return math.copysign(math.floor(abs(size) * q + 1e-9) / q, size)
+
+# Duración de cada intervalo en segundos (para alinear la caché con el cierre de vela)
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400
+}
+
+# Vigencia máxima (segundos) de unas velas en caché: la última vela sigue abierta
+# y su close/high/low cambian, así que no se espera al cierre en intervalos largos
+CANDLES_MAX_TTL = 60
+
+def _candles_expiry(candles: pd.DataFrame, interval: str, now: float) -> float:
+    """
+    Calcula hasta cuándo son válidas unas velas: hasta el cierre de la vela en
+    curso, pero como mucho una décima del intervalo y CANDLES_MAX_TTL segundos,
+    para que la vela abierta no quede congelada.
+    
+    Args:
+        candles: DataFrame de velas OHLC (columna "time" en milisegundos)
+        interval: Intervalo de tiempo (ej. "5m")
+        now: Instante actual (epoch en segundos)
+        
+    Returns:
+        Instante de expiración (epoch en segundos), al menos 1 segundo en el futuro
+    """
+    interval_sec = INTERVAL_SECONDS.get(interval, 300)
+    
+    # Cierre de la última vela; si ya pasó, siguiente cierre alineado al intervalo
+    next_close = candles["time"].iloc[-1] / 1000 + interval_sec if not candles.empty else 0
+    if next_close <= now:
+        next_close = (now // interval_sec + 1) * interval_sec
+    
+    max_ttl = min(interval_sec / 10, CANDLES_MAX_TTL)
+    return max(now + 1, min(next_close, now + max_ttl))
+
+def _to_records(candles: Optional[pd.DataFrame]) -> List[Dict[str, Any]]:
+    """Convierte un DataFrame de velas a lista de diccionarios ([] si no hay datos)."""
+    if candles is None:
+        return []
+    return candles.to_dict("records")
+
+class PriceRec:
+    """Precio en caché de un activo (registro compacto sin __dict__)."""
+    
+    __slots__ = ("bid", "ask", "mid", "ts")
+    
+    def __init__(self, bid: float, ask: float, mid: float, ts: float):
+        self.bid = bid
+        self.ask = ask
+        self.mid = mid
+        self.ts = ts
+    
+    def as_tuple(self) -> Tuple[float, float, float]:
+        """Devuelve (bid, ask, mid)."""
+        return (self.bid, self.ask, self.mid)
+    
+    def as_dict(self) -> Dict[str, float]:
+        """Devuelve el diccionario de precios de la API pública."""
+        return {"bid": self.bid, "ask": self.ask, "mid": self.mid}
+
+# Último instante (monotónico) en que se emitió cada mensaje limitado
+_log_last_emit: Dict[str, float] = {}
+
+def _log_throttled(key: str, msg: str, *args, every: float = 1.0) -> None:
+    """
+    Emite un mensaje INFO como máximo una vez cada `every` segundos por clave,
+    para que el sondeo de muchos activos no se bloquee escribiendo logs.
+    
+    Args:
+        key: Clave que identifica el mensaje (ej. "velas_hl_BTC")
+        msg: Mensaje con formato %
+        *args: Argumentos del mensaje
+        every: Intervalo mínimo entre emisiones (segundos)
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    now = time.monotonic()
+    if now - _log_last_emit.get(key, float("-inf")) < every:
+        return
+    _log_last_emit[key] = now
+    logger.info(msg, *args)
+
+def _finalize_prices(bid: Optional[float], ask: Optional[float],
+                     last: Optional[float]) -> Optional[Tuple[float, float, float]]:
+    """
+    Calcula (bid, ask, mid) de un ticker. Si falta bid o ask, los estima a
+    ±0.05% del último precio.
+    
+    Args:
+        bid: Mejor precio de compra (puede faltar)
+        ask: Mejor precio de venta (puede faltar)
+        last: Último precio negociado (puede faltar)
+        
+    Returns:
+        Tupla (bid, ask, mid) o None si no hay ningún precio válido
+    """
+    if bid and ask:
+        return (bid, ask, (bid + ask) / 2)
+    if last and last > 0:
+        return (last * 0.9995, last * 1.0005, last)
+    return None
+
+def _has_data(result: Any) -> bool:
+    """Indica si una respuesta (diccionario de precios o DataFrame de velas) contiene datos."""
+    return result is not None and len(result) > 0
+
+def _ohlcv_to_frame(ohlcv: List[List[float]]) -> pd.DataFrame:
+    """
+    Convierte las filas OHLCV de CCXT en un DataFrame con una sola copia de datos.
+    
+    Args:
+        ohlcv: Lista de filas [timestamp, open, high, low, close, volume]
+        
+    Returns:
+        DataFrame con las columnas de OHLCV_COLUMNS
+    """
+    return _array_to_frame(np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6))
+
+def _array_to_frame(arr: np.ndarray) -> pd.DataFrame:
+    """
+    Construye el DataFrame de velas a partir de una matriz (N, 6) de float64.
+    La columna "time" se guarda como int64 (milisegundos) para operar con ella
+    de forma vectorizada.
+    
+    Args:
+        arr: Matriz con las columnas de OHLCV_COLUMNS
+        
+    Returns:
+        DataFrame de velas OHLC
+    """
+    candles = pd.DataFrame(arr, columns=OHLCV_COLUMNS)
+    candles["time"] = arr[:, 0].astype(np.int64)
+    return candles
+
 class CCXTDataProvider:
     """Clase para obtener datos de mercado usando CCXT con Hyperliquid como fuente principal."""
     
-    def __init__(self, ccxt_connection=None, base_url: str = None):
+    def __init__(self, ccxt_connection=None, base_url: str = None, use_websocket: bool = False):
         """
         Inicializa el proveedor de datos con CCXT.
         
         Args:
             ccxt_connection: Conexión CCXT a Hyperliquid (opcional)
             base_url: URL base de la API de Hyperliquid (opcional, para fallback)
+            use_websocket: Mantener los precios actualizados con el websocket de Hyperliquid
+                (desactivado por defecto; quien lo active debe llamar a stop_price_stream al terminar)
         """
         self.ccxt_connection = ccxt_connection
+        self.use_websocket = use_websocket and ccxt_connection is not None
         self.base_url = base_url or "https://api.hyperliquid.xyz"
         
-        # Inicializar Binance como fallback
-        self.binance_exchange = None
-        try:
-            self.binance_exchange = ccxt.binance({
-                'enableRateLimit': True,
-                'options': {
-                    'defaultType': 'spot'
-                }
-            })
-            logger.info("Binance inicializado como fallback")
-        except Exception as e:
-            logger.warning(f"No se pudo inicializar Binance como fallback: {str(e)}")
+        # Binance como fallback: se crea en el primer uso (ver binance_exchange)
+        self._binance = None
+        self._binance_failed = False
+        self._binance_lock = threading.Lock()
+        
+        # Precargar mercados para que get_sz_decimals sea una búsqueda en memoria
+        if self.ccxt_connection:
+            try:
+                self.ccxt_connection.exchange.load_markets()
+            except Exception as e:
+                logger.warning("No se pudieron precargar los mercados de Hyperliquid: %s", e)
         
         # Crear directorio de caché si no existe
         self.cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
         os.makedirs(self.cache_dir, exist_ok=True)
         
-        # Caché de datos
-        self._candles_cache = {}
-        self._price_cache = {}
+        # Caché de datos (LRU acotadas)
+        self._candles_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._price_cache: "OrderedDict[str, PriceRec]" = OrderedDict()
+        self._candles_bytes = 0
+        self._cache_lock = threading.Lock()
+        self._sz_decimals_cache: Dict[str, int] = {}
+        
+        # Hilos para lanzar en paralelo las peticiones a Hyperliquid y Binance
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="data_io")
         
-        logger.info(f"Proveedor de datos CCXT inicializado. Directorio de caché: {self.cache_dir}")
+        # Un lock por clave para que solo un hilo descargue cada dato caducado
+        self._fetch_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        
+        # Peticiones de precio en curso (single-flight): activo -> Event
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Stream websocket de precios (se arranca con la primera suscripción)
+        self._ws_assets: Dict[str, str] = {}
+        self._ws_lock = threading.Lock()
+        self._ws_thread = None
+        self._ws_loop = None
+        self._ws_exchange = None
+        self._ws_stop = threading.Event()
+        
+        logger.info("Proveedor de datos CCXT inicializado. Directorio de caché: %s", self.cache_dir)
     
-    def get_hyperliquid_candles_ccxt(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+    @property
+    def binance_exchange(self) -> Optional[ccxt.binance]:
+        """
+        Exchange de Binance usado como fallback. Se inicializa en el primer acceso
+        para no pagar su coste de arranque si Hyperliquid nunca falla.
+        
+        Returns:
+            Exchange CCXT de Binance o None si no se pudo inicializar
+        """
+        if self._binance is None and not self._binance_failed:
+            with self._binance_lock:
+                if self._binance is None and not self._binance_failed:
+                    try:
+                        self._binance = ccxt.binance({
+                            'enableRateLimit': True,
+                            'options': {
+                                'defaultType': 'spot'
+                            }
+                        })
+                        logger.info("Binance inicializado como fallback")
+                    except Exception as e:
+                        self._binance_failed = True
+                        logger.warning("No se pudo inicializar Binance como fallback: %s", e)
+        return self._binance
+    
+    def _cache_get(self, cache: OrderedDict, key: str) -> Any:
+        """
+        Lee una entrada de una caché LRU y la marca como usada recientemente.
+        
+        Args:
+            cache: Caché LRU
+            key: Clave de la entrada
+            
+        Returns:
+            Entrada de la caché o None si no existe
+        """
+        with self._cache_lock:
+            entry = cache.get(key)
+            if entry is not None:
+                cache.move_to_end(key)
+            return entry
+    
+    def _store_candles(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Guarda velas en la caché LRU, expulsando las menos usadas si se superan
+        MAX_CANDLES_ENTRIES o MAX_CANDLES_BYTES.
+        
+        Args:
+            key: Clave de la entrada
+            entry: Entrada con el DataFrame en "data"
+        """
+        entry["nbytes"] = int(entry["data"].memory_usage(index=True).sum())
+        with self._cache_lock:
+            old = self._candles_cache.pop(key, None)
+            if old is not None:
+                self._candles_bytes -= old["nbytes"]
+            
+            self._candles_cache[key] = entry
+            self._candles_bytes += entry["nbytes"]
+            
+            while len(self._candles_cache) > 1 and (
+                len(self._candles_cache) > MAX_CANDLES_ENTRIES or self._candles_bytes > MAX_CANDLES_BYTES
+            ):
+                _, evicted = self._candles_cache.popitem(last=False)
+                self._candles_bytes -= evicted["nbytes"]
+    
+    def _store_price(self, key: str, entry: PriceRec) -> None:
+        """
+        Guarda un precio en la caché LRU, expulsando los menos usados si se supera MAX_PRICE_ENTRIES.
+        
+        Args:
+            key: Clave de la entrada
+            entry: Precio con bid, ask, mid y timestamp
+        """
+        with self._cache_lock:
+            self._price_cache[key] = entry
+            self._price_cache.move_to_end(key)
+            while len(self._price_cache) > MAX_PRICE_ENTRIES:
+                self._price_cache.popitem(last=False)
+    
+    def _fetch_candles(self, fetch_ohlcv: Callable, symbol: str, interval: str,
+                       limit: int, cache_key: str) -> pd.DataFrame:
+        """
+        Descarga velas con el fetch_ohlcv ya resuelto del exchange y las guarda
+        en la caché de memoria y de disco. Si ya hay velas en caché (aunque hayan
+        caducado) solo se piden las nuevas desde la última guardada.
+        
+        Args:
+            fetch_ohlcv: Método fetch_ohlcv del exchange CCXT
+            symbol: Símbolo CCXT
+            interval: Intervalo de tiempo (ej. "5m")
+            limit: Número máximo de velas
+            cache_key: Clave de la caché
+            
+        Returns:
+            DataFrame de velas OHLC
+        """
+        # Mapear el intervalo al formato de CCXT
+        timeframe = _TIMEFRAME_MAP.get(interval, "5m")
+        interval_ms = INTERVAL_SECONDS.get(interval, 300) * 1000
+        
+        with self._cache_lock:
+            previous = self._candles_cache.get(cache_key)
+        previous = previous["data"] if previous is not None else None
+        
+        candles = None
+        if previous is not None and not previous.empty:
+            last_ts = int(previous["time"].iloc[-1])
+            # Descarga incremental solo si el hueco cabe en una petición
+            if time.time() * 1000 - last_ts < (limit - 1) * interval_ms:
+                # Se vuelve a pedir la última vela porque pudo seguir abierta al guardarla
+                new_rows = _ohlcv_to_frame(fetch_ohlcv(symbol, timeframe, since=last_ts, limit=limit))
+                if not new_rows.empty:
+                    kept = previous[previous["time"] < new_rows["time"].iloc[0]]
+                    candles = pd.concat([kept, new_rows], ignore_index=True).tail(limit).reset_index(drop=True)
+        
+        if candles is None:
+            # Descarga completa, convirtiendo a DataFrame en una sola pasada
+            candles = _ohlcv_to_frame(fetch_ohlcv(symbol, timeframe, limit=limit))
+        
+        # Actualizar caché
+        now = time.time()
+        self._store_candles(cache_key, {
+            "data": candles,
+            "timestamp": now,
+            "expires": _candles_expiry(candles, interval, now)
+        })
+        self._save_candles(cache_key, candles)
+        
+        return candles
+    
+    def get_hyperliquid_candles_df(self, asset: str, interval: str = "5m", limit: int = 100) -> Optional[pd.DataFrame]:
         """
         Obtiene datos OHLC desde Hyperliquid usando CCXT.
         
@@ -64,59 +417,22 @@ class CCXTDataProvider:
             limit: Número máximo de velas
             
         Returns:
-            Lista de velas OHLC
+            DataFrame de velas OHLC o None si hay error
         """
         if not self.ccxt_connection:
             logger.warning("No hay conexión CCXT disponible para Hyperliquid")
-            return []
+            return None
         
         try:
-            symbol = f"{asset}/USDC:USDC"
-            
-            # Mapear el intervalo al formato de CCXT
-            timeframe_map = {
-                "1m": "1m",
-                "5m": "5m",
-                "15m": "15m",
-                "30m": "30m",
-                "1h": "1h",
-                "4h": "4h",
-                "1d": "1d"
-            }
-            
-            timeframe = timeframe_map.get(interval, "5m")
-            
-            logger.info(f"Obteniendo velas de Hyperliquid (CCXT) para {symbol}, intervalo {timeframe}, límite {limit}")
-            
-            # Obtener velas OHLC usando CCXT
-            ohlcv = self.ccxt_connection.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            
-            # Convertir al formato esperado por el bot
-            candles = []
-            for candle in ohlcv:
-                timestamp, open_price, high, low, close, volume = candle
-                candles.append({
-                    "time": timestamp,
-                    "open": open_price,
-                    "high": high,
-                    "low": low,
-                    "close": close,
-                    "volume": volume
-                })
-            
-            logger.info(f"Obtenidas {len(candles)} velas de Hyperliquid (CCXT) para {asset}")
-            
-            # Actualizar caché
-            cache_key = f"{asset}_{interval}_{limit}"
-            self._candles_cache[cache_key] = {
-                "data": candles,
-                "timestamp": time.time()
-            }
-            
+            candles = self._fetch_candles(
+                self.ccxt_connection.exchange.fetch_ohlcv, _hl_symbol(asset), interval, limit,
+                f"{asset}_{interval}_{limit}"
+            )
+            _log_throttled(f"velas_hl_{asset}", "Obtenidas %d velas de Hyperliquid (CCXT) para %s", len(candles), asset)
             return candles
         except Exception as e:
-            logger.error(f"Error al obtener velas de Hyperliquid (CCXT) para {asset}: {str(e)}")
-            return []
+            logger.error("Error al obtener velas de Hyperliquid (CCXT) para %s: %s", asset, e)
+            return None
     
     def get_hyperliquid_price_ccxt(self, asset: str) -> Dict[str, float]:
         """
@@ -133,51 +449,29 @@ class CCXTDataProvider:
             return {}
         
         try:
-            symbol = f"{asset}/USDC:USDC"
-            
-            logger.info(f"Obteniendo precio de Hyperliquid (CCXT) para {symbol}")
+            symbol = _hl_symbol(asset)
             
             # Obtener ticker usando CCXT
             ticker = self.ccxt_connection.exchange.fetch_ticker(symbol)
             
             # Extraer precios
-            bid = ticker.get('bid', 0)
-            ask = ticker.get('ask', 0)
-            last = ticker.get('last', 0)
-            
-            # Usar el precio 'last' como mid si no hay bid/ask
-            if not bid or not ask:
-                if last:
-                    # Estimar bid y ask (±0.05% del precio)
-                    bid = last * 0.9995
-                    ask = last * 1.0005
-                    mid = last
-                else:
-                    logger.error(f"No se pudieron obtener precios válidos para {asset}")
-                    return {}
-            else:
-                mid = (bid + ask) / 2
+            prices = _finalize_prices(ticker.get('bid'), ticker.get('ask'), ticker.get('last'))
+            if prices is None:
+                logger.error("No se pudieron obtener precios válidos para %s", asset)
+                return {}
             
-            logger.info(f"Precios para {asset} (Hyperliquid CCXT): bid={bid}, ask={ask}, mid={mid}")
+            rec = PriceRec(*prices, time.time())
+            _log_throttled(f"precio_hl_{asset}", "Precios para %s (Hyperliquid CCXT): bid=%s, ask=%s, mid=%s", asset, *prices)
             
             # Actualizar caché de precios
-            self._price_cache[asset] = {
-                "bid": bid,
-                "ask": ask,
-                "mid": mid,
-                "timestamp": time.time()
-            }
+            self._store_price(asset, rec)
             
-            return {
-                "bid": bid,
-                "ask": ask,
-                "mid": mid
-            }
+            return rec.as_dict()
         except Exception as e:
-            logger.error(f"Error al obtener precio de Hyperliquid (CCXT) para {asset}: {str(e)}")
+            logger.error("Error al obtener precio de Hyperliquid (CCXT) para %s: %s", asset, e)
             return {}
     
-    def get_binance_candles_ccxt(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+    def get_binance_candles_df(self, asset: str, interval: str = "5m", limit: int = 100) -> Optional[pd.DataFrame]:
         """
         Obtiene datos OHLC desde Binance usando CCXT como fallback.
         
@@ -187,59 +481,22 @@ class CCXTDataProvider:
             limit: Número máximo de velas
             
         Returns:
-            Lista de velas OHLC
+            DataFrame de velas OHLC o None si hay error
         """
         if not self.binance_exchange:
             logger.warning("No hay conexión CCXT disponible para Binance")
-            return []
+            return None
         
         try:
-            symbol = f"{asset}/USDT"
-            
-            # Mapear el intervalo al formato de CCXT
-            timeframe_map = {
-                "1m": "1m",
-                "5m": "5m",
-                "15m": "15m",
-                "30m": "30m",
-                "1h": "1h",
-                "4h": "4h",
-                "1d": "1d"
-            }
-            
-            timeframe = timeframe_map.get(interval, "5m")
-            
-            logger.info(f"Obteniendo velas de Binance (CCXT) para {symbol}, intervalo {timeframe}, límite {limit}")
-            
-            # Obtener velas OHLC usando CCXT
-            ohlcv = self.binance_exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            
-            # Convertir al formato esperado por el bot
-            candles = []
-            for candle in ohlcv:
-                timestamp, open_price, high, low, close, volume = candle
-                candles.append({
-                    "time": timestamp,
-                    "open": open_price,
-                    "high": high,
-                    "low": low,
-                    "close": close,
-                    "volume": volume
-                })
-            
-            logger.info(f"Obtenidas {len(candles)} velas de Binance (CCXT) para {asset}")
-            
-            # Actualizar caché
-            cache_key = f"{asset}_{interval}_{limit}_binance"
-            self._candles_cache[cache_key] = {
-                "data": candles,
-                "timestamp": time.time()
-            }
-            
+            candles = self._fetch_candles(
+                self.binance_exchange.fetch_ohlcv, _binance_symbol(asset), interval, limit,
+                f"{asset}_{interval}_{limit}_binance"
+            )
+            _log_throttled(f"velas_bn_{asset}", "Obtenidas %d velas de Binance (CCXT) para %s", len(candles), asset)
             return candles
         except Exception as e:
-            logger.error(f"Error al obtener velas de Binance (CCXT) para {asset}: {str(e)}")
-            return []
+            logger.error("Error al obtener velas de Binance (CCXT) para %s: %s", asset, e)
+            return None
     
     def get_binance_price_ccxt(self, asset: str) -> Dict[str, float]:
         """
@@ -256,51 +513,29 @@ class CCXTDataProvider:
             return {}
         
         try:
-            symbol = f"{asset}/USDT"
-            
-            logger.info(f"Obteniendo precio de Binance (CCXT) para {symbol}")
+            symbol = _binance_symbol(asset)
             
             # Obtener ticker usando CCXT
             ticker = self.binance_exchange.fetch_ticker(symbol)
             
             # Extraer precios
-            bid = ticker.get('bid', 0)
-            ask = ticker.get('ask', 0)
-            last = ticker.get('last', 0)
-            
-            # Usar el precio 'last' como mid si no hay bid/ask
-            if not bid or not ask:
-                if last:
-                    # Estimar bid y ask (±0.05% del precio)
-                    bid = last * 0.9995
-                    ask = last * 1.0005
-                    mid = last
-                else:
-                    logger.error(f"No se pudieron obtener precios válidos de Binance para {asset}")
-                    return {}
-            else:
-                mid = (bid + ask) / 2
+            prices = _finalize_prices(ticker.get('bid'), ticker.get('ask'), ticker.get('last'))
+            if prices is None:
+                logger.error("No se pudieron obtener precios válidos de Binance para %s", asset)
+                return {}
             
-            logger.info(f"Precios para {asset} (Binance CCXT): bid={bid}, ask={ask}, mid={mid}")
+            rec = PriceRec(*prices, time.time())
+            _log_throttled(f"precio_bn_{asset}", "Precios para %s (Binance CCXT): bid=%s, ask=%s, mid=%s", asset, *prices)
             
             # Actualizar caché de precios
-            self._price_cache[f"{asset}_binance"] = {
-                "bid": bid,
-                "ask": ask,
-                "mid": mid,
-                "timestamp": time.time()
-            }
+            self._store_price(f"{asset}_binance", rec)
             
-            return {
-                "bid": bid,
-                "ask": ask,
-                "mid": mid
-            }
+            return rec.as_dict()
         except Exception as e:
-            logger.error(f"Error al obtener precio de Binance (CCXT) para {asset}: {str(e)}")
+            logger.error("Error al obtener precio de Binance (CCXT) para %s: %s", asset, e)
             return {}
     
-    def get_cached_candles(self, asset: str, interval: str, limit: int) -> List[Dict[str, Any]]:
+    def get_cached_candles_df(self, asset: str, interval: str, limit: int) -> Optional[pd.DataFrame]:
         """
         Obtiene velas desde la caché si están disponibles y son recientes.
         
@@ -310,19 +545,96 @@ class CCXTDataProvider:
             limit: Número máximo de velas
             
         Returns:
-            Lista de velas OHLC o vacía si no hay caché válida
+            DataFrame de velas OHLC o None si no hay caché válida
         """
         cache_key = f"{asset}_{interval}_{limit}"
-        cached_data = self._candles_cache.get(cache_key, {})
+        cached_data = self._cache_get(self._candles_cache, cache_key)
         
         if cached_data:
-            # Verificar si la caché es reciente (menos de 1 minuto para datos de 5m)
-            cache_timeout = 60 if interval == "5m" else 300  # 1 minuto para 5m, 5 minutos para otros
-            if time.time() - cached_data.get("timestamp", 0) < cache_timeout:
-                logger.info(f"Usando velas en caché para {asset} ({interval})")
+            # Verificar que la vela en curso no haya cerrado todavía
+            if time.time() < cached_data.get("expires", 0):
+                logger.debug("Usando velas en caché para %s (%s)", asset, interval)
                 return cached_data["data"]
+            return None
         
-        return []
+        # Arranque en caliente: velas guardadas en disco por una ejecución anterior
+        candles = self._load_candles(cache_key, interval)
+        if candles is not None:
+            logger.info("Usando velas en caché de disco para %s (%s)", asset, interval)
+        return candles
+    
+    def _candles_path(self, cache_key: str) -> str:
+        """Ruta del fichero de caché en disco para una clave de velas."""
+        return os.path.join(self.cache_dir, f"candles_{cache_key}.npy")
+    
+    def _save_candles(self, cache_key: str, candles: pd.DataFrame) -> None:
+        """
+        Guarda velas en disco de forma atómica (escritura temporal + rename).
+        
+        Args:
+            cache_key: Clave de la caché
+            candles: DataFrame de velas OHLC
+        """
+        path = self._candles_path(cache_key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, candles[OHLCV_COLUMNS].to_numpy(dtype=np.float64))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("No se pudieron guardar las velas en disco (%s): %s", cache_key, e)
+    
+    def _load_candles(self, cache_key: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Carga velas desde disco (mapeadas en memoria) si la última vela sigue abierta.
+        
+        Args:
+            cache_key: Clave de la caché
+            interval: Intervalo de tiempo
+            
+        Returns:
+            DataFrame de velas OHLC o None si no hay fichero o está obsoleto
+        """
+        path = self._candles_path(cache_key)
+        try:
+            arr = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("No se pudieron cargar las velas de disco (%s): %s", cache_key, e)
+            return None
+        
+        if arr.ndim != 2 or arr.shape[0] == 0 or arr.shape[1] != len(OHLCV_COLUMNS):
+            return None
+        
+        # Solo es válido mientras la última vela guardada no haya cerrado
+        now = time.time()
+        if now >= arr[-1, 0] / 1000 + INTERVAL_SECONDS.get(interval, 300):
+            return None
+        
+        candles = _array_to_frame(arr)
+        self._store_candles(cache_key, {
+            "data": candles,
+            "timestamp": now,
+            "expires": _candles_expiry(candles, interval, now)
+        })
+        return candles
+    
+    def get_cached_price_tuple(self, asset: str) -> Optional[Tuple[float, float, float]]:
+        """
+        Obtiene el precio desde la caché como tupla, sin crear diccionarios.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            
+        Returns:
+            Tupla (bid, ask, mid) o None si no hay caché válida
+        """
+        rec = self._cache_get(self._price_cache, asset)
+        # Verificar si la caché es reciente (menos de 30 segundos)
+        if rec is not None and time.time() - rec.ts < 30:
+            return rec.as_tuple()
+        return None
     
     def get_cached_price(self, asset: str) -> Dict[str, float]:
         """
@@ -334,21 +646,17 @@ class CCXTDataProvider:
         Returns:
             Diccionario con precios o vacío si no hay caché válida
         """
-        cached_data = self._price_cache.get(asset, {})
-        if cached_data:
-            # Verificar si la caché es reciente (menos de 30 segundos)
-            if time.time() - cached_data.get("timestamp", 0) < 30:
-                logger.info(f"Usando precio en caché para {asset}: {cached_data['mid']}")
-                return {
-                    "bid": cached_data["bid"],
-                    "ask": cached_data["ask"],
-                    "mid": cached_data["mid"]
-                }
+        rec = self._cache_get(self._price_cache, asset)
+        # Verificar si la caché es reciente (menos de 30 segundos)
+        if rec is not None and time.time() - rec.ts < 30:
+            logger.debug("Usando precio en caché para %s: %s", asset, rec.mid)
+            return rec.as_dict()
         return {}
     
-    def get_candles(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+    def get_candles_df(self, asset: str, interval: str = "5m", limit: int = 100) -> Optional[pd.DataFrame]:
         """
-        Obtiene datos OHLC usando Hyperliquid como fuente principal y Binance como fallback.
+        Obtiene datos OHLC como DataFrame usando Hyperliquid como fuente principal
+        y Binance como fallback.
         
         Args:
             asset: Símbolo del activo (ej. "BTC")
@@ -356,28 +664,142 @@ class CCXTDataProvider:
             limit: Número máximo de velas
             
         Returns:
-            Lista de velas OHLC
+            DataFrame de velas OHLC o None si no hay datos
         """
         # Intentar obtener de la caché primero
-        candles = self.get_cached_candles(asset, interval, limit)
-        if candles:
+        candles = self.get_cached_candles_df(asset, interval, limit)
+        if candles is not None and not candles.empty:
             return candles
         
-        # Intentar obtener de Hyperliquid usando CCXT
-        candles = self.get_hyperliquid_candles_ccxt(asset, interval, limit)
-        if candles:
-            logger.info(f"Datos de velas obtenidos de Hyperliquid para {asset}")
+        with self._fetch_locks[f"candles_{asset}_{interval}_{limit}"]:
+            # Otro hilo pudo descargar las velas mientras esperábamos el lock
+            candles = self.get_cached_candles_df(asset, interval, limit)
+            if candles is not None and not candles.empty:
+                return candles
+            
+            # Hyperliquid como fuente principal; Binance solo si falla o no responde
+            source, candles = self._with_fallback(
+                self.get_hyperliquid_candles_df,
+                self.get_binance_candles_df,
+                asset, interval, limit
+            )
+        if candles is not None:
+            _log_throttled(f"velas_{asset}", "Datos de velas obtenidos de %s para %s", source, asset)
             return candles
         
-        # Intentar obtener de Binance como fallback
-        candles = self.get_binance_candles_ccxt(asset, interval, limit)
-        if candles:
-            logger.info(f"Datos de velas obtenidos de Binance (fallback) para {asset}")
-            return candles
+        # Si todo falla, no hay datos
+        logger.error("No se pudieron obtener datos de velas para %s de ninguna fuente", asset)
+        return None
+    
+    def get_candle_arrays(self, asset: str, interval: str = "5m", limit: int = 100) -> Dict[str, np.ndarray]:
+        """
+        Obtiene datos OHLC en formato columnar (un array de NumPy por campo).
+        Los arrays son vistas sobre las columnas de la caché, sin copiar datos.
         
-        # Si todo falla, devolver una lista vacía
-        logger.error(f"No se pudieron obtener datos de velas para {asset} de ninguna fuente")
-        return []
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            interval: Intervalo de tiempo (ej. "5m", "1h", "1d")
+            limit: Número máximo de velas
+            
+        Returns:
+            Diccionario con arrays: time (int64), open, high, low, close, volume
+            (vacío si no hay datos)
+        """
+        candles = self.get_candles_df(asset, interval, limit)
+        if candles is None:
+            return {}
+        return {column: candles[column].to_numpy() for column in OHLCV_COLUMNS}
+    
+    def _with_fallback(self, primary: Callable, fallback: Callable, *args) -> Tuple[str, Any]:
+        """
+        Consulta Hyperliquid y solo recurre a Binance si falla, no devuelve datos
+        o no responde en PRIMARY_TIMEOUT segundos. Así el precio es siempre el del
+        perpetuo que opera el bot salvo que Hyperliquid no esté disponible.
+        
+        Args:
+            primary: Función de Hyperliquid
+            fallback: Función de Binance
+            *args: Argumentos comunes a ambas funciones
+            
+        Returns:
+            Tupla (fuente, datos); datos es None si ninguna fuente devolvió nada
+        """
+        future = self._executor.submit(primary, *args)
+        try:
+            result = future.result(timeout=PRIMARY_TIMEOUT)
+            if _has_data(result):
+                return "Hyperliquid", result
+        except FutureTimeoutError:
+            # La petición no se puede interrumpir; si acaba, su resultado solo alimenta la caché
+            logger.warning("Hyperliquid no respondió en %.1fs", PRIMARY_TIMEOUT)
+        
+        if not self.binance_exchange:
+            return "", None
+        
+        result = fallback(*args)
+        if _has_data(result):
+            return "Binance (fallback)", result
+        return "", None
+    
+    def get_candles(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Obtiene datos OHLC usando Hyperliquid como fuente principal y Binance como fallback.
+        Adaptador para los consumidores que esperan una lista de diccionarios.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            interval: Intervalo de tiempo (ej. "5m", "1h", "1d")
+            limit: Número máximo de velas
+            
+        Returns:
+            Lista de velas OHLC
+        """
+        return _to_records(self.get_candles_df(asset, interval, limit))
+    
+    def get_hyperliquid_candles_ccxt(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Obtiene datos OHLC desde Hyperliquid usando CCXT (lista de diccionarios).
+        Ver get_hyperliquid_candles_df para el formato DataFrame.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            interval: Intervalo de tiempo (ej. "5m", "1h", "1d")
+            limit: Número máximo de velas
+            
+        Returns:
+            Lista de velas OHLC (vacía si hay error)
+        """
+        return _to_records(self.get_hyperliquid_candles_df(asset, interval, limit))
+    
+    def get_binance_candles_ccxt(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Obtiene datos OHLC desde Binance usando CCXT (lista de diccionarios).
+        Ver get_binance_candles_df para el formato DataFrame.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            interval: Intervalo de tiempo (ej. "5m", "1h", "1d")
+            limit: Número máximo de velas
+            
+        Returns:
+            Lista de velas OHLC (vacía si hay error)
+        """
+        return _to_records(self.get_binance_candles_df(asset, interval, limit))
+    
+    def get_cached_candles(self, asset: str, interval: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Obtiene velas desde la caché si están disponibles y son recientes (lista de diccionarios).
+        Ver get_cached_candles_df para el formato DataFrame.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            interval: Intervalo de tiempo
+            limit: Número máximo de velas
+            
+        Returns:
+            Lista de velas OHLC o vacía si no hay caché válida
+        """
+        return _to_records(self.get_cached_candles_df(asset, interval, limit))
     
     def get_current_price(self, asset: str) -> Dict[str, float]:
         """
@@ -389,31 +811,274 @@ class CCXTDataProvider:
         Returns:
             Diccionario con precios bid, ask y mid
         """
+        # Registrar el activo en el stream websocket para que la caché se mantenga fresca
+        if self.use_websocket:
+            self.subscribe(asset)
+        
         # Intentar obtener de la caché primero
         price_data = self.get_cached_price(asset)
         if price_data:
             return price_data
         
-        # Intentar obtener de Hyperliquid usando CCXT
-        price_data = self.get_hyperliquid_price_ccxt(asset)
-        if price_data:
-            logger.info(f"Precio obtenido de Hyperliquid para {asset}")
-            return price_data
-        
-        # Intentar obtener de Binance como fallback
-        price_data = self.get_binance_price_ccxt(asset)
-        if price_data:
-            logger.info(f"Precio obtenido de Binance (fallback) para {asset}")
+        with self._fetch_locks[f"price_{asset}"]:
+            # Otro hilo pudo actualizar el precio mientras esperábamos el lock
+            price_data = self.get_cached_price(asset)
+            if price_data:
+                return price_data
+            
+            # Reutilizar el cierre de unas velas recién descargadas
+            price_data = self._price_from_candles(asset)
+            if price_data:
+                return price_data
+            
+            # Hyperliquid como fuente principal; Binance solo si falla o no responde
+            source, price_data = self._with_fallback(
+                self.get_hyperliquid_price_ccxt,
+                self.get_binance_price_ccxt,
+                asset
+            )
+        if price_data is not None:
+            _log_throttled(f"precio_{asset}", "Precio obtenido de %s para %s", source, asset)
             return price_data
         
         # Si todo falla, devolver un diccionario vacío
-        logger.error(f"No se pudo obtener el precio actual para {asset} de ninguna fuente")
+        logger.error("No se pudo obtener el precio actual para %s de ninguna fuente", asset)
+        return {}
+    
+    def _price_from_candles(self, asset: str) -> Dict[str, float]:
+        """
+        Deriva el precio del último cierre de velas de Hyperliquid en caché si se
+        descargaron hace menos de una décima parte de su intervalo.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            
+        Returns:
+            Diccionario con precios bid, ask y mid o vacío si no hay velas recientes
+        """
+        now = time.time()
+        prefix = f"{asset}_"
+        with self._cache_lock:
+            entries = [(key, entry) for key, entry in self._candles_cache.items()
+                       if key.startswith(prefix) and not key.endswith("_binance")]
+        
+        for key, entry in entries:
+            interval = key[len(prefix):].rsplit("_", 1)[0]
+            if now - entry["timestamp"] >= INTERVAL_SECONDS.get(interval, 300) / 10:
+                continue
+            
+            candles = entry["data"]
+            if candles.empty:
+                continue
+            
+            prices = _finalize_prices(None, None, float(candles["close"].iloc[-1]))
+            if prices is None:
+                continue
+            
+            return PriceRec(*prices, now).as_dict()
+        
         return {}
     
+    def subscribe(self, asset: str) -> None:
+        """
+        Suscribe un activo al stream websocket de precios. El stream escribe
+        bid/ask/mid en la caché de precios en segundo plano.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+        """
+        with self._ws_lock:
+            if asset not in self._ws_assets:
+                self._ws_assets[asset] = _hl_symbol(asset)
+                logger.info("Activo %s suscrito al stream de precios", asset)
+            
+            if self._ws_thread is not None and self._ws_thread.is_alive():
+                return
+            
+            self._ws_stop.clear()
+            self._ws_thread = threading.Thread(
+                target=self._run_price_stream,
+                name="PriceStream",
+                daemon=True
+            )
+            self._ws_thread.start()
+        logger.info("Stream websocket de precios iniciado")
+    
+    def stop_price_stream(self) -> None:
+        """Detiene el stream websocket de precios; los precios vuelven a obtenerse por REST."""
+        self._ws_stop.set()
+        
+        # Cerrar el websocket desde su propio event loop para desbloquear watch_tickers
+        loop, ws = self._ws_loop, self._ws_exchange
+        if loop is not None and ws is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(ws.close(), loop)
+        
+        if self._ws_thread is not None:
+            self._ws_thread.join(timeout=5.0)
+            self._ws_thread = None
+        logger.info("Stream websocket de precios detenido")
+    
+    def _run_price_stream(self) -> None:
+        """Punto de entrada del hilo del stream: ejecuta su propio event loop."""
+        try:
+            asyncio.run(self._price_stream())
+        except Exception as e:
+            logger.error("Error en el stream websocket de precios: %s", e)
+        finally:
+            self._ws_loop = None
+            self._ws_exchange = None
+    
+    async def _price_stream(self) -> None:
+        """
+        Escucha los tickers de los activos suscritos y actualiza la caché de precios.
+        Reconecta con backoff exponencial.
+        """
+        self._ws_loop = asyncio.get_running_loop()
+        ws = ccxtpro.hyperliquid({
+            'options': {
+                'defaultType': 'swap'
+            }
+        })
+        if getattr(self.ccxt_connection, 'testnet', False):
+            ws.set_sandbox_mode(True)
+        self._ws_exchange = ws
+        
+        backoff = 1.0
+        try:
+            while not self._ws_stop.is_set():
+                try:
+                    with self._ws_lock:
+                        symbols = dict((symbol, asset) for asset, symbol in self._ws_assets.items())
+                    
+                    tickers = await ws.watch_tickers(list(symbols))
+                    now = time.time()
+                    for symbol, ticker in tickers.items():
+                        asset = symbols.get(symbol)
+                        if asset is None:
+                            continue
+                        
+                        prices = _finalize_prices(ticker.get('bid'), ticker.get('ask'), ticker.get('last'))
+                        if prices is not None:
+                            self._store_price(asset, PriceRec(*prices, now))
+                    backoff = 1.0
+                except Exception as e:
+                    if self._ws_stop.is_set():
+                        break
+                    logger.warning("Stream de precios interrumpido, reintentando en %.0fs: %s", backoff, e)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+        finally:
+            await ws.close()
+    
+    def _fetch_hyperliquid_prices(self, assets: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Obtiene los precios de varios activos de Hyperliquid en una sola llamada fetch_tickers.
+        
+        Args:
+            assets: Lista de símbolos de activos
+            
+        Returns:
+            Diccionario activo -> precios bid, ask y mid (solo activos con precio válido)
+        """
+        if not self.ccxt_connection:
+            return {}
+        
+        try:
+            symbols = {_hl_symbol(asset): asset for asset in assets}
+            tickers = self.ccxt_connection.exchange.fetch_tickers(list(symbols))
+        except Exception as e:
+            logger.error("Error al obtener precios en lote de Hyperliquid (CCXT): %s", e)
+            return {}
+        
+        results = {}
+        now = time.time()
+        for symbol, asset in symbols.items():
+            ticker = tickers.get(symbol)
+            if not ticker:
+                continue
+            
+            prices = _finalize_prices(ticker.get('bid'), ticker.get('ask'), ticker.get('last'))
+            if prices is None:
+                continue
+            
+            rec = PriceRec(*prices, now)
+            self._store_price(asset, rec)
+            results[asset] = rec.as_dict()
+        
+        _log_throttled("precios_lote", "Precios en lote de Hyperliquid (CCXT): %s/%s activos", len(results), len(assets))
+        return results
+    
+    def get_current_prices(self, assets: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Obtiene el precio actual de varios activos con una sola petición a Hyperliquid.
+        Las peticiones concurrentes para el mismo activo se agrupan: solo un hilo
+        consulta la red y el resto espera su resultado.
+        
+        Args:
+            assets: Lista de símbolos de activos (ej. ["BTC", "ETH"])
+            
+        Returns:
+            Diccionario activo -> precios bid, ask y mid
+        """
+        results = {}
+        pending = []
+        for asset in dict.fromkeys(assets):
+            price_data = self.get_cached_price(asset)
+            if price_data:
+                results[asset] = price_data
+            else:
+                pending.append(asset)
+        
+        if not pending:
+            return results
+        
+        # Reclamar los activos que nadie está consultando; esperar al resto
+        owned = []
+        waiting = []
+        with self._inflight_lock:
+            for asset in pending:
+                event = self._inflight.get(asset)
+                if event is None:
+                    self._inflight[asset] = threading.Event()
+                    owned.append(asset)
+                else:
+                    waiting.append((asset, event))
+        
+        try:
+            if owned:
+                results.update(self._fetch_hyperliquid_prices(owned))
+        finally:
+            with self._inflight_lock:
+                for asset in owned:
+                    self._inflight.pop(asset).set()
+        
+        for asset, event in waiting:
+            event.wait(timeout=10)
+            price_data = self.get_cached_price(asset)
+            if price_data:
+                results[asset] = price_data
+        
+        # Los activos sin precio pasan por la ruta individual (incluye fallback a Binance)
+        for asset in pending:
+            if asset not in results:
+                price_data = self.get_current_price(asset)
+                if price_data:
+                    results[asset] = price_data
+        
+        return results
+    
+    def reload_markets(self) -> None:
+        """Recarga los mercados de Hyperliquid e invalida la caché de decimales."""
+        self._sz_decimals_cache.clear()
+        if self.ccxt_connection:
+            self.ccxt_connection.reload_markets()
+    
     def get_sz_decimals(self, asset: str) -> int:
         """
         Obtiene el número de decimales para el tamaño de orden de un activo.
         CORREGIDO: Siempre devuelve un entero válido.
+        Los metadatos del mercado no cambian durante la sesión, así que el
+        resultado se cachea hasta la siguiente llamada a reload_markets.
         
         Args:
             asset: Símbolo del activo (ej. "BTC")
@@ -421,17 +1086,16 @@ class CCXTDataProvider:
         Returns:
             Número de decimales (siempre un entero)
         """
+        cached = self._sz_decimals_cache.get(asset)
+        if cached is not None:
+            return cached
+        
         if not self.ccxt_connection:
             # Valores predeterminados si no hay conexión CCXT
-            default_decimals = {
-                "BTC": 3,  # 0.001
-                "ETH": 2,  # 0.01
-                "SOL": 1,  # 0.1
-            }
-            return default_decimals.get(asset, 2)
+            return DEFAULT_SZ_DECIMALS.get(asset, 2)
         
         try:
-            symbol = f"{asset}/USDC:USDC"
+            symbol = _hl_symbol(asset)
             market = self.ccxt_connection.exchange.market(symbol)
             
             # Obtener precisión del amount
@@ -439,28 +1103,24 @@ class CCXTDataProvider:
             amount_precision = precision.get('amount', None)
             
             # CORREGIDO: Verificar que amount_precision no sea None
-            if amount_precision is not None and isinstance(amount_precision, (int, float)):
-                return int(amount_precision)
-            
-            # Si no se encuentra o es None, usar valores predeterminados
-            default_decimals = {
-                "BTC": 3,  # 0.001
-                "ETH": 2,  # 0.01
-                "SOL": 1,  # 0.1
-            }
-            result = default_decimals.get(asset, 2)
-            logger.warning(f"No se pudo determinar decimales para {asset}. Usando valor predeterminado: {result}")
+            if amount_precision is not None and isinstance(amount_precision, (int, float)) and amount_precision > 0:
+                # En modo TICK_SIZE (Hyperliquid) la precisión es el step (ej. 1e-05 -> 5 decimales)
+                if self.ccxt_connection.exchange.precisionMode == ccxt.TICK_SIZE:
+                    result = max(0, int(round(-math.log10(amount_precision))))
+                else:
+                    result = int(amount_precision)
+            else:
+                # Si no se encuentra o es None, usar valores predeterminados
+                result = DEFAULT_SZ_DECIMALS.get(asset, 2)
+                logger.warning("No se pudo determinar decimales para %s. Usando valor predeterminado: %s", asset, result)
+            
+            self._sz_decimals_cache[asset] = result
             return result
             
         except Exception as e:
-            logger.error(f"Error al obtener decimales para {asset}: {str(e)}")
-            # Valores predeterminados seguros
-            default_decimals = {
-                "BTC": 3,  # 0.001
-                "ETH": 2,  # 0.01
-                "SOL": 1,  # 0.1
-            }
-            return default_decimals.get(asset, 2)
+            logger.error("Error al obtener decimales para %s: %s", asset, e)
+            # Valores predeterminados seguros (sin cachear para reintentar)
+            return DEFAULT_SZ_DECIMALS.get(asset, 2)
     
     def normalize_size(self, asset: str, size: float) -> float:
         """
@@ -479,16 +1139,17 @@ class CCXTDataProvider:
             
             # CORREGIDO: Asegurar que decimals sea un entero válido
             if not isinstance(decimals, int) or decimals < 0:
-                logger.warning(f"Decimales inválidos para {asset}: {decimals}. Usando 3 por defecto.")
+                logger.warning("Decimales inválidos para %s: %s. Usando 3 por defecto.", asset, decimals)
                 decimals = 3
             
             # Limitar decimals a un rango razonable
             decimals = min(max(decimals, 0), 8)  # Entre 0 y 8 decimales
             
-            return round(size, decimals)
+            # Truncar en lugar de redondear para no superar el tamaño/saldo disponible
+            return _floor_to_decimals(size, decimals)
             
         except Exception as e:
-            logger.error(f"Error al normalizar tamaño para {asset}: {str(e)}")
+            logger.error("Error al normalizar tamaño para %s: %s", asset, e)
             # En caso de error, usar 3 decimales por defecto
-            return round(size, 3)
+            return _floor_to_decimals(size, 3)
 
@@ -7,14 +7,27 @@ Versión 4.1: Corrige la visualización de indicadores técnicos.
 Versión 4.5: Añade log separado solo para errores.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import time
 import os
 import sys
 from datetime import datetime
 import threading
-import json
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import ccxt
+
+try:
+    from numba import njit
+except ImportError:  # numba es opcional; sin él las funciones se ejecutan en Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 # Configurar paths
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -27,6 +40,7 @@ from src.ccxt_connection import CCXTHyperliquidConnection
 from src.technical import TechnicalAnalysis
 from src.ccxt_orders import CCXTOrderManager
 from src.risk import RiskManager
+from src.cache import DiskCache
 
 # Configurar logging con archivo separado para errores
 log_dir = os.path.join(parent_dir, "logs")
@@ -43,19 +57,28 @@ root_logger.setLevel(logging.INFO)
 for handler in root_logger.handlers[:]:
     root_logger.removeHandler(handler)
 
+# Tamaño máximo de los ficheros de log antes de rotar, y copias que se conservan
+COMPLETE_LOG_MAX_BYTES = 50 * 1024 * 1024
+ERROR_LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
 # Formato de log
 log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# Handler para log completo (todos los niveles)
-complete_log_handler = logging.FileHandler(
-    os.path.join(log_dir, f"ccxt_bot_complete_{timestamp}.log")
+# Handler para log completo (todos los niveles), rotado para que no crezca sin límite
+complete_log_handler = logging.handlers.RotatingFileHandler(
+    os.path.join(log_dir, f"ccxt_bot_complete_{timestamp}.log"),
+    maxBytes=COMPLETE_LOG_MAX_BYTES,
+    backupCount=LOG_BACKUP_COUNT
 )
 complete_log_handler.setLevel(logging.INFO)
 complete_log_handler.setFormatter(log_format)
 
 # Handler para log de errores únicamente (ERROR y CRITICAL)
-error_log_handler = logging.FileHandler(
-    os.path.join(log_dir, f"ccxt_bot_errors_{timestamp}.log")
+error_log_handler = logging.handlers.RotatingFileHandler(
+    os.path.join(log_dir, f"ccxt_bot_errors_{timestamp}.log"),
+    maxBytes=ERROR_LOG_MAX_BYTES,
+    backupCount=LOG_BACKUP_COUNT
 )
 error_log_handler.setLevel(logging.ERROR)
 error_log_handler.setFormatter(log_format)
@@ -65,10 +88,27 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(log_format)
 
-# Añadir handlers al logger raíz
-root_logger.addHandler(complete_log_handler)
-root_logger.addHandler(error_log_handler)
-root_logger.addHandler(console_handler)
+# El logger raíz solo encola los registros; un hilo en segundo plano los escribe
+# en fichero y consola, fuera del hilo de trading
+log_queue = queue.Queue(-1)
+root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    complete_log_handler,
+    error_log_handler,
+    console_handler,
+    respect_handler_level=True
+)
+
+def flush_log_files() -> None:
+    """Fuerza a disco lo que los handlers de fichero ya han escrito (el listener sigue activo)."""
+    complete_log_handler.flush()
+    error_log_handler.flush()
+
+# El listener es compartido por todos los bots del proceso: no se detiene al parar
+# un bot, solo al salir (vaciando antes la cola)
+log_listener.start()
+atexit.register(log_listener.stop)
 
 logger = logging.getLogger("ccxt_main")
 
@@ -76,10 +116,105 @@ logger = logging.getLogger("ccxt_main")
 logger.info("=" * 60)
 logger.info("🚀 INICIANDO BOT DE TRADING CCXT HYPERLIQUID")
 logger.info("=" * 60)
-logger.info(f"📁 Log completo: ccxt_bot_complete_{timestamp}.log")
-logger.info(f"❌ Log de errores: ccxt_bot_errors_{timestamp}.log")
+logger.info("📁 Log completo: ccxt_bot_complete_%s.log", timestamp)
+logger.info("❌ Log de errores: ccxt_bot_errors_%s.log", timestamp)
 logger.info("=" * 60)
 
+# Pool HTTP de la conexión: el bot consulta posiciones, precios, órdenes y
+# balance sobre el mismo exchange en cada tick
+CONNECTION_POOL_CONNECTIONS = 40
+CONNECTION_POOL_MAXSIZE = 100
+
+# Antigüedad máxima (segundos) de las posiciones cacheadas en disco
+POSITIONS_CACHE_TTL = 5
+
+# Plantillas del informe de seguimiento de posiciones
+SEPARATOR = "-" * 50
+POS_TEMPLATE = (
+    "Posición #{i}: {asset} {side} {ptype}\n"
+    "  Tamaño: {size} {asset}\n"
+    "  Precio entrada: ${entry:.2f}\n"
+    "  Precio actual: ${price:.2f} {arrow} ${change:+.2f} ({change_pct:+.2f}%)\n"
+    "  Capital usado: ${capital:.2f}\n"
+    "  P/L: ${pnl:.2f} ({pnl_pct:+.2f}%) - {pnl_status}"
+)
+BOT_POS_TEMPLATE = (
+    "\n  Tiempo abierta: {hours:02d}:{minutes:02d}:{seconds:02d}"
+    "\n  Stop Loss: ${stop_loss}"
+    "\n  Take Profit: ${take_profit}"
+    "\n  Trailing Stop: ${trailing}"
+)
+MANUAL_POS_LINE = "\n  ⚠️ Posición manual - Sin gestión automática de riesgo"
+
+# Etiquetas indexadas por booleano (False, True)
+ARROW = ("📉", "📈")
+SIDE = ("SHORT", "LONG")
+PNL_STATUS = ("PÉRDIDA", "GANANCIA")
+POSITION_TYPE = ("👤 MANUAL", "🤖 BOT")
+
+# Errores de red esperables (cortes, timeouts): se registran sin traza completa
+TRANSIENT = (ccxt.NetworkError, ccxt.RequestTimeout, ccxt.ExchangeNotAvailable)
+
+def _log_exception(message: str, e: Exception) -> None:
+    """
+    Registra una excepción del bucle de trading. Los errores de red transitorios
+    se registran en una sola línea; el resto, con la traza completa.
+    
+    Args:
+        message: Descripción del contexto del error
+        e: Excepción capturada
+    """
+    if isinstance(e, TRANSIENT):
+        logger.error("%s (transitorio, %s): %s", message, type(e).__name__, e)
+    else:
+        logger.error("%s: %s", message, e, exc_info=True)
+
+# Iconos de estado y posiciones de Bollinger por código de _classify_indicators
+_CHECK = ("❌", "✅")
+_BB_POSITIONS = ("middle", "upper", "lower", "near_upper", "near_lower")
+
+@njit(cache=True)
+def _classify_indicators(rsi: float, bb_width: float, last_price: float, bb_upper: float,
+                         bb_lower: float, bounds: np.ndarray) -> Tuple[bool, int, bool]:
+    """
+    Evalúa el estado de los indicadores técnicos con comparaciones numéricas puras.
+    Se compila con numba si está instalado.
+    
+    Args:
+        rsi: Valor del RSI
+        bb_width: Ancho de las Bandas de Bollinger
+        last_price: Último precio
+        bb_upper: Banda superior de Bollinger
+        bb_lower: Banda inferior de Bollinger
+        bounds: [rsi_lower, rsi_upper, rsi_upper_short, rsi_overbought_short, bb_width_min, bb_width_max]
+        
+    Returns:
+        Tupla (RSI en rango, código de posición en _BB_POSITIONS, BB width en rango)
+    """
+    # RSI - En rango para LONG o para SHORT
+    rsi_ok = (bounds[0] <= rsi <= bounds[1]) or (bounds[2] <= rsi <= bounds[3])
+    
+    # BB Width - En rango válido
+    bbw_ok = bounds[4] <= bb_width <= bounds[5]
+    
+    # Bandas de Bollinger - Posición del precio (cerca = a menos del 10% del ancho)
+    if last_price >= bb_upper:
+        bb_code = 1
+    elif last_price <= bb_lower:
+        bb_code = 2
+    elif bb_upper > bb_lower:
+        band = bb_upper - bb_lower
+        if abs(last_price - bb_upper) / band < 0.1:
+            bb_code = 3
+        elif abs(last_price - bb_lower) / band < 0.1:
+            bb_code = 4
+        else:
+            bb_code = 0
+    else:
+        bb_code = 0
+    
+    return bool(rsi_ok), bb_code, bool(bbw_ok)
+
 class CCXTHyperliquidBot:
     """Clase principal del bot de trading para Hyperliquid con CCXT y estrategia optimizada para BTC."""
     
@@ -103,18 +238,36 @@ class CCXTHyperliquidBot:
         self.ta_config = self.config.get_technical_analysis_config()
         self.auth_config = self.config.get_auth_config()
         
+        # Límites de los indicadores, leídos una vez para get_indicator_status
+        self._ta_bounds = np.array([
+            self.ta_config.get("rsi_lower_bound", 15),
+            self.ta_config.get("rsi_upper_bound", 35),
+            self.ta_config.get("rsi_upper_bound_short", 65),
+            self.ta_config.get("rsi_overbought_short", 85),
+            self.ta_config.get("bb_width_min", 0.01),
+            self.ta_config.get("bb_width_max", 0.08)
+        ], dtype=np.float64)
+        
         # Inicializar componentes
         self.technical_analyzer = TechnicalAnalysis(self.ta_config)
         logger.info("Analizador técnico inicializado con estrategia optimizada para BTC")
         
-        # Inicializar conexión CCXT
-        self.connection = CCXTHyperliquidConnection(
+        # Inicializar conexión CCXT (compartida si ya existe para esta cuenta y red)
+        self.connection = CCXTHyperliquidConnection.get_or_create(
             wallet_address=self.auth_config["account_address"],
             private_key=self.auth_config["secret_key"],
-            testnet=self.general_config.get("testnet", False)
+            testnet=self.general_config.get("testnet", False),
+            connection_limits={
+                'pool_connections': CONNECTION_POOL_CONNECTIONS,
+                'pool_maxsize': CONNECTION_POOL_MAXSIZE
+            }
         )
         logger.info("Conexión CCXT a Hyperliquid inicializada")
         
+        # Caché en disco de respuestas recientes (compartida entre reinicios y procesos)
+        self.disk_cache = DiskCache(os.path.join(log_dir, ".cache"))
+        self._positions_cache_key = f"positions_{self.auth_config['account_address'].lower()}"
+        
         # Inicializar gestor de riesgos
         self.risk_manager = RiskManager(self.config)
         logger.info("Gestor de riesgos inicializado")
@@ -127,188 +280,308 @@ class CCXTHyperliquidBot:
             risk_manager=self.risk_manager,
             capital_percentage=capital_percentage
         )
-        logger.info(f"Gestor de órdenes CCXT inicializado con {capital_percentage}% del capital")
+        logger.info("Gestor de órdenes CCXT inicializado con %s%% del capital", capital_percentage)
         
         # Flags de control
         self.running = False
         self.thread = None
         
+        # Serializa start/stop para que no se intercalen entre hilos
+        self._lifecycle_lock = threading.Lock()
+        
+        # Despierta al bucle de trading en cuanto se pide la parada
+        self._stop_event = threading.Event()
+        
+        # Despierta al bucle antes de tiempo cuando el stream de órdenes notifica
+        # cambios (ejecuciones, cancelaciones, órdenes manuales)
+        self._wake_event = threading.Event()
+        self._positions_dirty = False
+        
+        # Hilos para solapar peticiones REST independientes dentro de un tick
+        # (solo mientras el bot está en ejecución: se crean en start y se liberan en stop)
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        
         # Configuración de intervalos
         self.position_check_interval = 30  # 30 segundos para seguimiento de posiciones
         self.analysis_interval = 30  # 30 segundos para análisis técnico
         
         logger.info("Bot CCXT inicializado correctamente con estrategia optimizada para BTC")
-        logger.info(f"Intervalos configurados: Seguimiento de posiciones={self.position_check_interval}s, Análisis técnico={self.analysis_interval}s")
+        logger.info("Intervalos configurados: Seguimiento de posiciones=%ss, Análisis técnico=%ss", self.position_check_interval, self.analysis_interval)
         logger.info("🔍 NUEVO: Detecta y hace seguimiento de TODAS las posiciones (automáticas y manuales)")
         logger.info("📝 NUEVO: Log separado para errores únicamente")
     
-    def get_current_btc_price(self) -> float:
+    def new_tick_cache(self, real_positions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
-        Obtiene el precio actual de BTC.
+        Crea la caché de una iteración del bucle: posiciones reales y precios
+        obtenidos durante el tick, para no repetir peticiones REST.
+        
+        Args:
+            real_positions: Posiciones ya obtenidas por el llamador (opcional; se consultan si no se pasan)
         
         Returns:
-            Precio actual de BTC o 0 si hay error
+            Diccionario con 'positions', 'prices' (activo -> precio) y 'ts'
         """
+        if real_positions is None:
+            # Tras un cambio en las órdenes la caché en disco de posiciones no es fiable
+            use_cache = not self._positions_dirty
+            self._positions_dirty = False
+            real_positions = self.get_real_positions_from_account(use_cache=use_cache)
+        return {
+            'positions': real_positions,
+            'prices': {},
+            'ts': time.monotonic()
+        }
+    
+    def get_current_price(self, asset: str, cache: Optional[Dict[str, Any]] = None) -> float:
+        """
+        Obtiene el precio actual de un activo, reutilizando el de la caché del tick si existe.
+        
+        Args:
+            asset: Símbolo del activo (ej. "BTC")
+            cache: Caché del tick actual (opcional)
+            
+        Returns:
+            Precio actual o 0 si hay error
+        """
+        if cache is not None and asset in cache['prices']:
+            return cache['prices'][asset]
+        
         try:
-            market_data = self.connection.get_market_data("BTC")
-            if market_data:
-                return float(market_data.get("midPrice", 0))
-            return 0.0
+            market_data = self.connection.get_market_data(asset)
+            price = float(market_data.get("midPrice", 0)) if market_data else 0.0
         except Exception as e:
-            logger.error(f"Error al obtener precio actual de BTC: {str(e)}")
+            logger.error("Error al obtener precio actual de %s: %s", asset, e)
             return 0.0
+        
+        if cache is not None and price > 0:
+            cache['prices'][asset] = price
+        return price
     
-    def get_real_positions_from_account(self) -> List[Dict[str, Any]]:
+    def prefetch_prices(self, assets: List[str], cache: Dict[str, Any]) -> None:
+        """
+        Obtiene en una sola petición (fetch_tickers) los precios de los activos
+        que aún no están en la caché del tick.
+        
+        Args:
+            assets: Lista de símbolos de activos
+            cache: Caché del tick actual
+        """
+        missing = [a for a in dict.fromkeys(assets) if a not in cache['prices']]
+        if not missing:
+            return
+        
+        for asset_name, market_data in self.connection.get_market_data_bulk(missing).items():
+            price = float(market_data.get("midPrice", 0))
+            if price > 0:
+                cache['prices'][asset_name] = price
+    
+    def get_current_btc_price(self, cache: Optional[Dict[str, Any]] = None) -> float:
+        """
+        Obtiene el precio actual de BTC.
+        
+        Args:
+            cache: Caché del tick actual (opcional)
+            
+        Returns:
+            Precio actual de BTC o 0 si hay error
+        """
+        if cache is not None and "BTC" in cache['prices']:
+            return cache['prices']["BTC"]
+        
+        # La conexión reutiliza su último precio si es reciente (y gestiona sus errores)
+        price = float(self.connection.get_market_price("BTC") or 0)
+        
+        if cache is not None and price > 0:
+            cache['prices']["BTC"] = price
+        return price
+    
+    def get_real_positions_from_account(self, use_cache: bool = True) -> List[Dict[str, Any]]:
         """
         Obtiene todas las posiciones reales abiertas en la cuenta usando CCXT.
         
+        La caché en disco se comparte entre procesos (clave por wallet), pero solo se
+        invalida con los cambios de órdenes que ve este proceso: si otro proceso opera
+        la misma wallet, aquí se pueden recibir posiciones de hasta POSITIONS_CACHE_TTL
+        segundos de antigüedad. Usar use_cache=False cuando eso no sea aceptable.
+        
+        Args:
+            use_cache: Aceptar posiciones cacheadas en disco de hace menos de POSITIONS_CACHE_TTL
+        
         Returns:
             Lista de posiciones abiertas
         """
+        if use_cache:
+            cached_positions = self.disk_cache.get(self._positions_cache_key, POSITIONS_CACHE_TTL)
+            if cached_positions is not None:
+                return cached_positions
+        
         try:
             # Obtener posiciones usando CCXT
-            positions = self.connection.exchange.fetch_positions()
+            positions = self.connection.get_positions()
             
-            # Filtrar solo posiciones abiertas (con tamaño > 0)
+            # Filtrar solo posiciones abiertas (con tamaño != 0)
             open_positions = []
             for position in positions:
-                if position and position.get('contracts', 0) != 0:
-                    # Convertir al formato esperado por el bot
-                    symbol = position.get('symbol', '')
-                    asset = symbol.split('/')[0] if '/' in symbol else symbol
-                    
-                    # Determinar si es long o short
-                    contracts = float(position.get('contracts', 0))
-                    is_buy = contracts > 0
-                    size = abs(contracts)
-                    
-                    # Obtener precio de entrada
-                    entry_price = float(position.get('entryPrice', 0))
-                    
-                    # Calcular capital usado (aproximado)
-                    capital_used = size * entry_price
-                    
-                    open_positions.append({
-                        'asset': asset,
-                        'symbol': symbol,
-                        'is_buy': is_buy,
-                        'size': size,
-                        'entry_price': entry_price,
-                        'capital_used': capital_used,
-                        'unrealized_pnl': float(position.get('unrealizedPnl', 0)),
-                        'percentage': float(position.get('percentage', 0)),
-                        'contracts': contracts,
-                        'side': position.get('side', 'long' if is_buy else 'short'),
-                        'raw_position': position  # Guardar datos originales
-                    })
+                # Una sola lectura de 'contracts'; las posiciones cerradas se descartan de inmediato
+                contracts = float(position.get('contracts') or 0) if position else 0.0
+                if not contracts:
+                    continue
+                
+                # Convertir al formato esperado por el bot
+                symbol = position.get('symbol') or ''
+                is_buy = contracts > 0
+                size = abs(contracts)
+                entry_price = float(position.get('entryPrice') or 0)
+                
+                open_positions.append({
+                    'asset': symbol.partition('/')[0],
+                    'symbol': symbol,
+                    'is_buy': is_buy,
+                    'size': size,
+                    'entry_price': entry_price,
+                    'capital_used': size * entry_price,  # Capital usado (aproximado)
+                    'unrealized_pnl': float(position.get('unrealizedPnl') or 0),
+                    'percentage': float(position.get('percentage') or 0),
+                    'contracts': contracts,
+                    'side': position.get('side') or ('long' if is_buy else 'short'),
+                    'raw_position': position  # Guardar datos originales
+                })
             
+            self.disk_cache.set(self._positions_cache_key, open_positions)
             return open_positions
             
         except Exception as e:
-            logger.error(f"Error al obtener posiciones reales de la cuenta: {str(e)}")
+            logger.error("Error al obtener posiciones reales de la cuenta: %s", e)
             return []
     
-    def monitor_all_positions(self, asset: str) -> None:
+    def monitor_all_positions(self, asset: str, cache: Optional[Dict[str, Any]] = None,
+                              real_positions: Optional[List[Dict[str, Any]]] = None) -> None:
         """
         Monitorea TODAS las posiciones activas (automáticas y manuales) y muestra información detallada de P/L.
         
         Args:
             asset: Símbolo del activo (ej. "BTC")
+            cache: Caché del tick actual (opcional; se crea si no se pasa)
+            real_positions: Posiciones ya obtenidas, usadas si no se pasa `cache`
         """
         try:
-            # Obtener precio actual de BTC
-            current_btc_price = self.get_current_btc_price()
+            if cache is None:
+                cache = self.new_tick_cache(real_positions)
+            
+            # Una sola lectura del reloj para todo el informe de este tick
+            now = datetime.now()
             
             # Verificar posiciones del bot para take profit, stop loss y trailing stop
-            self.order_manager.check_positions()
+            # en segundo plano mientras se consultan los precios
+            bot_positions_before = len(self.order_manager.active_positions)
+            io_pool = self._io_pool
+            check_future = io_pool.submit(self.order_manager.check_positions) if io_pool else None
+            
+            # Precios de BTC y de todos los activos con posición en una sola petición
+            self.prefetch_prices(["BTC"] + [p["asset"] for p in cache['positions']], cache)
+            current_btc_price = self.get_current_btc_price(cache)
+            
+            if check_future is not None:
+                check_future.result()
+            else:
+                # Llamada fuera del bucle de trading (bot no iniciado): verificación directa
+                self.order_manager.check_positions()
             
-            # Obtener TODAS las posiciones reales de la cuenta
-            real_positions = self.get_real_positions_from_account()
+            # Obtener TODAS las posiciones reales de la cuenta (de nuevo solo si el bot cerró alguna)
+            if len(self.order_manager.active_positions) < bot_positions_before:
+                cache['positions'] = self.get_real_positions_from_account(use_cache=False)
+            real_positions = cache['positions']
             
-            if real_positions:
-                logger.info("=== SEGUIMIENTO DE TODAS LAS POSICIONES ===")
-                logger.info(f"💰 Precio actual BTC: ${current_btc_price:.2f}")
-                logger.info(f"📊 Total posiciones detectadas: {len(real_positions)}")
-                logger.info("-" * 50)
+            if not real_positions:
+                logger.info("📊 No hay posiciones abiertas en la cuenta")
+            elif logger.isEnabledFor(logging.INFO):
+                # El informe es solo de log: no se calcula si INFO está filtrado
+                logger.info("=== SEGUIMIENTO DE TODAS LAS POSICIONES ===\n"
+                            "💰 Precio actual BTC: $%.2f\n"
+                            "📊 Total posiciones detectadas: %s\n%s",
+                            current_btc_price, len(real_positions), SEPARATOR)
+                
+                # Posiciones del bot indexadas por activo (una sola pasada; gana la primera)
+                bot_by_asset = {}
+                for pos_data in self.order_manager.active_positions.values():
+                    bot_by_asset.setdefault(pos_data["asset"], pos_data)
+                
+                # Cálculo vectorizado de la variación de precio de todas las posiciones
+                prices = np.fromiter((self.get_current_price(p["asset"], cache) for p in real_positions),
+                                     dtype=np.float64, count=len(real_positions))
+                entries = np.fromiter((p["entry_price"] for p in real_positions),
+                                      dtype=np.float64, count=len(real_positions))
+                valid = (prices > 0) & (entries > 0)
+                safe_entries = np.where(valid, entries, 1.0)
+                price_changes = prices - entries
+                price_change_pcts = (prices / safe_entries - 1.0) * 100.0
                 
+                # El bucle solo compone y emite el log de cada posición
                 for i, position in enumerate(real_positions, 1):
                     asset_name = position["asset"]
-                    is_buy = position["is_buy"]
-                    size = position["size"]
-                    entry_price = position["entry_price"]
-                    capital_used = position["capital_used"]
                     unrealized_pnl = position["unrealized_pnl"]
-                    pnl_percentage = position["percentage"]
                     
-                    # Usar el precio actual ya obtenido para BTC
-                    if asset_name == "BTC":
-                        current_price = current_btc_price
-                    else:
-                        # Para otros activos, obtener precio específico
-                        market_data = self.connection.get_market_data(asset_name)
-                        current_price = float(market_data.get("midPrice", 0)) if market_data else 0
-                    
-                    if current_price <= 0:
-                        logger.warning(f"Precio actual no válido para {asset_name}")
+                    if not valid[i - 1]:
+                        logger.warning("Precio actual no válido para %s", asset_name)
                         continue
                     
-                    # Calcular cambio de precio desde entrada
-                    price_change = current_price - entry_price
-                    price_change_pct = ((current_price / entry_price) - 1) * 100
+                    current_price = float(prices[i - 1])
+                    price_change = float(price_changes[i - 1])
                     
                     # Determinar el estado de la posición
-                    pnl_status = "GANANCIA" if unrealized_pnl >= 0 else "PÉRDIDA"
-                    price_direction = "📈" if price_change >= 0 else "📉"
-                    position_type = "🤖 BOT" if any(pos["asset"] == asset_name for pos in self.order_manager.active_positions.values()) else "👤 MANUAL"
-                    
-                    logger.info(f"Posición #{i}: {asset_name} {'LONG' if is_buy else 'SHORT'} {position_type}")
-                    logger.info(f"  Tamaño: {size} {asset_name}")
-                    logger.info(f"  Precio entrada: ${entry_price:.2f}")
-                    logger.info(f"  Precio actual: ${current_price:.2f} {price_direction} ${price_change:+.2f} ({price_change_pct:+.2f}%)")
-                    logger.info(f"  Capital usado: ${capital_used:.2f}")
-                    logger.info(f"  P/L: ${unrealized_pnl:.2f} ({pnl_percentage:+.2f}%) - {pnl_status}")
+                    bot_position = bot_by_asset.get(asset_name)
+                    fields = {
+                        "i": i,
+                        "asset": asset_name,
+                        "side": SIDE[position["is_buy"]],
+                        "ptype": POSITION_TYPE[bot_position is not None],
+                        "size": position["size"],
+                        "entry": position["entry_price"],
+                        "price": current_price,
+                        "arrow": ARROW[price_change >= 0],
+                        "change": price_change,
+                        "change_pct": float(price_change_pcts[i - 1]),
+                        "capital": position["capital_used"],
+                        "pnl": unrealized_pnl,
+                        "pnl_pct": position["percentage"],
+                        "pnl_status": PNL_STATUS[unrealized_pnl >= 0]
+                    }
+                    text = POS_TEMPLATE.format_map(fields)
                     
                     # Mostrar información adicional para posiciones del bot
-                    bot_position = None
-                    for pos_key, pos_data in self.order_manager.active_positions.items():
-                        if pos_data["asset"] == asset_name:
-                            bot_position = pos_data
-                            break
-                    
                     if bot_position:
                         # Calcular tiempo transcurrido
                         entry_time = bot_position["entry_time"]
-                        time_elapsed = datetime.now() - entry_time
+                        time_elapsed = now - entry_time
                         hours, remainder = divmod(time_elapsed.total_seconds(), 3600)
                         minutes, seconds = divmod(remainder, 60)
-                        time_str = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
                         
                         # Obtener niveles de riesgo
                         risk_levels = bot_position.get("risk_levels", {})
-                        stop_loss = risk_levels.get("stop_loss", {}).get("stop_level", "N/A")
-                        take_profit = risk_levels.get("take_profit", {}).get("take_profit_level", "N/A")
-                        trailing_activation = risk_levels.get("trailing_stop", {}).get("activation_level", "N/A")
-                        
-                        logger.info(f"  Tiempo abierta: {time_str}")
-                        logger.info(f"  Stop Loss: ${stop_loss}")
-                        logger.info(f"  Take Profit: ${take_profit}")
-                        logger.info(f"  Trailing Stop: ${trailing_activation}")
+                        text += BOT_POS_TEMPLATE.format_map({
+                            "hours": int(hours),
+                            "minutes": int(minutes),
+                            "seconds": int(seconds),
+                            "stop_loss": risk_levels.get("stop_loss", {}).get("stop_level", "N/A"),
+                            "take_profit": risk_levels.get("take_profit", {}).get("take_profit_level", "N/A"),
+                            "trailing": risk_levels.get("trailing_stop", {}).get("activation_level", "N/A")
+                        })
                     else:
-                        logger.info(f"  ⚠️ Posición manual - Sin gestión automática de riesgo")
+                        text += MANUAL_POS_LINE
                     
-                    logger.info("-" * 50)
+                    # Un solo registro de log por posición
+                    logger.info("%s\n%s", text, SEPARATOR)
                 
                 # Mostrar resumen de cuenta
                 account_summary = self.order_manager.get_account_summary()
-                logger.info(f"Capital total: ${account_summary['total_capital']:.2f} | "
-                           f"Disponible: ${account_summary['available_capital']:.2f} | "
-                           f"Reservado: ${account_summary['reserved_capital']:.2f}")
-                logger.info("=" * 50)
-            else:
-                logger.info("📊 No hay posiciones abiertas en la cuenta")
+                logger.info("Capital total: $%.2f | Disponible: $%.2f | Reservado: $%.2f\n%s",
+                            account_summary['total_capital'],
+                            account_summary['available_capital'],
+                            account_summary['reserved_capital'],
+                            "=" * 50)
             
         except Exception as e:
-            logger.error(f"Error al monitorear todas las posiciones: {str(e)}", exc_info=True)
+            _log_exception("Error al monitorear todas las posiciones", e)
     
     def get_indicator_status(self, analysis: Dict[str, Any]) -> str:
         """
@@ -323,94 +596,56 @@ class CCXTHyperliquidBot:
         """
         try:
             # Los datos están directamente en el nivel superior del análisis
-            rsi_value = analysis.get("rsi", 0)
-            bb_width = analysis.get("bb_width", 0)
-            last_price = analysis.get("last_price", 0)
-            bollinger_upper = analysis.get("bollinger_upper", 0)
-            bollinger_lower = analysis.get("bollinger_lower", 0)
-            bollinger_ma = analysis.get("bollinger_ma", 0)
-            
-            # Obtener configuración de parámetros del analizador técnico
-            rsi_lower_bound = self.ta_config.get("rsi_lower_bound", 15)
-            rsi_upper_bound = self.ta_config.get("rsi_upper_bound", 35)
-            rsi_upper_bound_short = self.ta_config.get("rsi_upper_bound_short", 65)
-            rsi_overbought_short = self.ta_config.get("rsi_overbought_short", 85)
-            bb_width_min = self.ta_config.get("bb_width_min", 0.01)
-            bb_width_max = self.ta_config.get("bb_width_max", 0.08)
-            
-            # RSI - Verificar si está en rango para LONG o SHORT
-            if (rsi_lower_bound <= rsi_value <= rsi_upper_bound) or (rsi_upper_bound_short <= rsi_value <= rsi_overbought_short):
-                rsi_status = f"✅ RSI({rsi_value:.1f})"
-            else:
-                rsi_status = f"❌ RSI({rsi_value:.1f})"
-            
-            # Bandas de Bollinger - Verificar posición del precio
-            bb_position = "middle"
-            bb_signal_active = False
-            
-            if last_price >= bollinger_upper:
-                bb_position = "upper"
-                bb_signal_active = True
-            elif last_price <= bollinger_lower:
-                bb_position = "lower"
-                bb_signal_active = True
-            else:
-                # Calcular distancia relativa a las bandas
-                if bollinger_upper > bollinger_lower:
-                    distance_to_upper = abs(last_price - bollinger_upper) / (bollinger_upper - bollinger_lower)
-                    distance_to_lower = abs(last_price - bollinger_lower) / (bollinger_upper - bollinger_lower)
-                    
-                    if distance_to_upper < 0.1:  # Muy cerca de banda superior
-                        bb_position = "near_upper"
-                        bb_signal_active = True
-                    elif distance_to_lower < 0.1:  # Muy cerca de banda inferior
-                        bb_position = "near_lower"
-                        bb_signal_active = True
-            
-            if bb_signal_active:
-                bb_status = f"✅ BB({bb_position})"
-            else:
-                bb_status = f"❌ BB({bb_position})"
+            rsi_value = float(analysis.get("rsi", 0))
+            bb_width = float(analysis.get("bb_width", 0))
             
-            # BB Width - Verificar si está en rango válido
-            if bb_width_min <= bb_width <= bb_width_max:
-                bb_width_status = f"✅ BBW({bb_width:.3f})"
-            else:
-                bb_width_status = f"❌ BBW({bb_width:.3f})"
+            rsi_ok, bb_code, bbw_ok = _classify_indicators(
+                rsi_value,
+                bb_width,
+                float(analysis.get("last_price", 0)),
+                float(analysis.get("bollinger_upper", 0)),
+                float(analysis.get("bollinger_lower", 0)),
+                self._ta_bounds
+            )
+            
+            rsi_status = f"{_CHECK[rsi_ok]} RSI({rsi_value:.1f})"
+            bb_status = f"{_CHECK[bb_code != 0]} BB({_BB_POSITIONS[bb_code]})"
+            bb_width_status = f"{_CHECK[bbw_ok]} BBW({bb_width:.3f})"
             
             return f"{rsi_status} | {bb_status} | {bb_width_status}"
             
         except Exception as e:
-            logger.error(f"Error al obtener estado de indicadores: {str(e)}")
+            logger.error("Error al obtener estado de indicadores: %s", e)
             return "❌ RSI(N/A) | ❌ BB(N/A) | ❌ BBW(N/A)"
     
-    def search_for_signals(self, asset: str) -> None:
+    def search_for_signals(self, asset: str, cache: Optional[Dict[str, Any]] = None) -> None:
         """
         Busca señales de trading cuando no hay posiciones activas.
         
         Args:
             asset: Símbolo del activo (ej. "BTC")
+            cache: Caché del tick actual (opcional)
         """
         try:
             # Obtener precio actual de BTC
-            current_btc_price = self.get_current_btc_price()
+            current_btc_price = self.get_current_btc_price(cache)
             
             logger.info("=== BÚSQUEDA DE SEÑALES DE TRADING ===")
-            logger.info(f"💰 Precio actual BTC: ${current_btc_price:.2f}")
+            logger.info("💰 Precio actual BTC: $%.2f", current_btc_price)
             
             # Analizar mercado
-            logger.info(f"Analizando {asset} para señales de entrada...")
+            logger.info("Analizando %s para señales de entrada...", asset)
             analysis = self.order_manager.analyze_market(asset)
             
             # Obtener estado de indicadores
             indicators_status = self.get_indicator_status(analysis)
-            logger.info(f"Indicadores: {indicators_status}")
+            logger.info("Indicadores: %s", indicators_status)
             
             # Verificar si hay señal
             signal = analysis.get("signals", {}).get("overall")
             if signal in ["buy", "sell"]:
-                logger.info(f"🎯 SEÑAL DETECTADA para {asset}: {signal.upper()}")
-                logger.info(f"Razón: {analysis.get('signals', {}).get('reason', 'No especificada')}")
+                logger.info("🎯 SEÑAL DETECTADA para %s: %s", asset, signal.upper())
+                logger.info("Razón: %s", analysis.get('signals', {}).get('reason', 'No especificada'))
                 
                 # Ejecutar señal
                 result = self.order_manager.execute_signal(
@@ -419,36 +654,57 @@ class CCXTHyperliquidBot:
                 )
                 
                 if result.get("status") == "ok":
-                    logger.info(f"✅ ORDEN EJECUTADA EXITOSAMENTE:")
-                    logger.info(f"  Asset: {result.get('asset')}")
-                    logger.info(f"  Tipo: {'LONG' if result.get('is_buy') else 'SHORT'}")
-                    logger.info(f"  Tamaño: {result.get('size')}")
-                    logger.info(f"  Precio: ${result.get('price'):.2f}")
-                    logger.info(f"  Capital usado: ${result.get('capital_used'):.2f}")
+                    logger.info("✅ ORDEN EJECUTADA EXITOSAMENTE:")
+                    logger.info("  Asset: %s", result.get('asset'))
+                    logger.info("  Tipo: %s", 'LONG' if result.get('is_buy') else 'SHORT')
+                    logger.info("  Tamaño: %s", result.get('size'))
+                    logger.info("  Precio: $%.2f", result.get('price'))
+                    logger.info("  Capital usado: $%.2f", result.get('capital_used'))
                     logger.info("🔄 Cambiando a modo seguimiento de posición...")
                 elif result.get("status") == "skipped":
-                    logger.info(f"⏭️ Orden omitida: {result.get('message')}")
+                    logger.info("⏭️ Orden omitida: %s", result.get('message'))
                 else:
-                    logger.error(f"❌ Error al ejecutar señal: {result}")
+                    logger.error("❌ Error al ejecutar señal: %s", result)
             else:
-                logger.info(f"📊 No hay señal clara para {asset}. Continuando análisis...")
+                logger.info("📊 No hay señal clara para %s. Continuando análisis...", asset)
                 if analysis.get("signals", {}).get("reason"):
-                    logger.info(f"Condiciones actuales: {analysis.get('signals', {}).get('reason')}")
+                    logger.info("Condiciones actuales: %s", analysis.get('signals', {}).get('reason'))
             
             # Mostrar resumen de cuenta
             account_summary = self.order_manager.get_account_summary()
-            logger.info(f"Capital disponible para trading: ${account_summary['available_capital']:.2f}")
+            logger.info("Capital disponible para trading: $%.2f", account_summary['available_capital'])
             logger.info("=" * 50)
             
         except Exception as e:
-            logger.error(f"Error al buscar señales: {str(e)}", exc_info=True)
+            _log_exception("Error al buscar señales", e)
+    
+    def _on_orders_update(self) -> None:
+        """Llamada desde el stream de órdenes: adelanta la siguiente iteración del bucle."""
+        self._positions_dirty = True
+        self._wake_event.set()
+    
+    def _wait(self, seconds: float) -> bool:
+        """
+        Espera hasta la siguiente iteración del bucle, o menos si llegan
+        cambios de órdenes por websocket o se pide la parada.
+        
+        Args:
+            seconds: Tiempo máximo de espera
+            
+        Returns:
+            True si se ha pedido detener el bot
+        """
+        if self._wake_event.wait(seconds) and not self._stop_event.is_set():
+            logger.info("⚡ Cambio en las órdenes recibido por websocket: adelantando iteración")
+        self._wake_event.clear()
+        return self._stop_event.is_set()
     
     def run_trading_loop(self):
         """Ejecuta el bucle principal de trading con comportamiento adaptativo."""
         logger.info("🚀 Iniciando bucle de trading adaptativo con CCXT")
         logger.info("📋 Comportamiento:")
-        logger.info(f"  • Con posiciones abiertas: Seguimiento cada {self.position_check_interval} segundos")
-        logger.info(f"  • Sin posiciones: Análisis técnico cada {self.analysis_interval} segundos")
+        logger.info("  • Con posiciones abiertas: Seguimiento cada %s segundos", self.position_check_interval)
+        logger.info("  • Sin posiciones: Análisis técnico cada %s segundos", self.analysis_interval)
         logger.info("🔍 NUEVO: Detecta posiciones automáticas Y manuales")
         logger.info("🔧 CORREGIDO: Visualización correcta de indicadores técnicos")
         logger.info("📝 NUEVO: Log separado para errores únicamente")
@@ -458,71 +714,97 @@ class CCXTHyperliquidBot:
         
         while self.running:
             try:
-                # Obtener TODAS las posiciones reales de la cuenta (no solo las del bot)
-                real_positions = self.get_real_positions_from_account()
+                # Caché del tick: TODAS las posiciones reales de la cuenta (no solo las del bot)
+                # y los precios que se consulten durante esta iteración
+                cache = self.new_tick_cache()
+                real_positions = cache['positions']
                 has_active_positions = len(real_positions) > 0
                 
                 if has_active_positions:
                     # MODO: SEGUIMIENTO DE POSICIONES (TODAS)
-                    logger.info(f"🔍 MODO: Seguimiento de todas las posiciones ({len(real_positions)} posición(es))")
-                    self.monitor_all_positions(asset)
+                    logger.info("🔍 MODO: Seguimiento de todas las posiciones (%s posición(es))", len(real_positions))
+                    self.monitor_all_positions(asset, cache)
                     
                     # Esperar intervalo de seguimiento de posiciones (30 segundos)
-                    time.sleep(self.position_check_interval)
+                    if self._wait(self.position_check_interval):
+                        break
                     
                 else:
                     # MODO: BÚSQUEDA DE SEÑALES
                     logger.info("🔎 MODO: Búsqueda de señales de trading")
-                    self.search_for_signals(asset)
+                    self.search_for_signals(asset, cache)
                     
                     # Esperar intervalo de análisis técnico (30 segundos)
-                    time.sleep(self.analysis_interval)
+                    if self._wait(self.analysis_interval):
+                        break
                 
             except Exception as e:
-                logger.error(f"❌ Error en bucle de trading: {str(e)}", exc_info=True)
-                time.sleep(30)  # Esperar antes de reintentar
+                _log_exception("❌ Error en bucle de trading", e)
+                if self._wait(30):  # Esperar antes de reintentar
+                    break
     
     def start(self):
         """Inicia la ejecución del bot."""
-        if self.running:
-            logger.warning("⚠️ El bot ya está en ejecución")
-            return
-        
-        logger.info("🎬 Iniciando bot de trading CCXT con estrategia optimizada para BTC")
-        logger.info("🔍 Detectará y hará seguimiento de TODAS las posiciones (automáticas y manuales)")
-        logger.info("📝 Log de errores guardado por separado para debugging")
-        
-        # Marcar como en ejecución
-        self.running = True
-        
-        # Crear e iniciar hilo principal
-        self.thread = threading.Thread(
-            target=self.run_trading_loop,
-            name="TradingLoop"
-        )
-        self.thread.daemon = True
-        self.thread.start()
-        
-        logger.info("✅ Bot CCXT iniciado correctamente")
+        with self._lifecycle_lock:
+            if self.running:
+                logger.warning("⚠️ El bot ya está en ejecución")
+                return
+            
+            logger.info("🎬 Iniciando bot de trading CCXT con estrategia optimizada para BTC")
+            logger.info("🔍 Detectará y hará seguimiento de TODAS las posiciones (automáticas y manuales)")
+            logger.info("📝 Log de errores guardado por separado para debugging")
+            
+            # Marcar como en ejecución
+            self.running = True
+            self._stop_event.clear()
+            self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bot_io")
+            
+            # Crear e iniciar hilo principal
+            self.thread = threading.Thread(
+                target=self.run_trading_loop,
+                name="TradingLoop"
+            )
+            self.thread.daemon = True
+            self.thread.start()
+            
+            # Mantener las órdenes abiertas actualizadas por websocket
+            self.connection.add_order_listener(self._on_orders_update)
+            self.connection.start_user_stream()
+            
+            logger.info("✅ Bot CCXT iniciado correctamente")
     
     def stop(self):
         """Detiene la ejecución del bot."""
-        if not self.running:
-            logger.warning("⚠️ El bot no está en ejecución")
-            return
-        
-        logger.info("🛑 Deteniendo bot de trading CCXT")
-        
-        # Marcar como detenido
-        self.running = False
-        
-        # Esperar a que el hilo termine
-        if self.thread:
-            self.thread.join(timeout=5.0)
-            logger.info("🔌 Hilo de trading detenido")
-        
-        self.thread = None
-        logger.info("✅ Bot CCXT detenido correctamente")
+        with self._lifecycle_lock:
+            if not self.running:
+                logger.warning("⚠️ El bot no está en ejecución")
+                return
+            
+            logger.info("🛑 Deteniendo bot de trading CCXT")
+            
+            # Marcar como detenido y despertar al bucle si está esperando
+            self.running = False
+            self._stop_event.set()
+            self._wake_event.set()
+            
+            # Esperar a que el hilo termine (puede estar en mitad de una petición)
+            if self.thread:
+                self.thread.join(timeout=max(self.position_check_interval, self.analysis_interval))
+                logger.info("🔌 Hilo de trading detenido")
+            
+            self.thread = None
+            
+            # Liberar los hilos de E/S del bot (sin esperar a una petición en curso)
+            if self._io_pool is not None:
+                self._io_pool.shutdown(wait=False)
+                self._io_pool = None
+            
+            self.connection.remove_order_listener(self._on_orders_update)
+            self.connection.stop_user_stream()
+            logger.info("✅ Bot CCXT detenido correctamente")
+            
+            # Asegurar en disco lo ya escrito; el listener sigue dando servicio a otros bots
+            flush_log_files()
     
     def set_capital_percentage(self, percentage: int):
         """
@@ -533,9 +815,9 @@ class CCXTHyperliquidBot:
         """
         result = self.order_manager.set_capital_percentage(percentage)
         if result.get("status") == "ok":
-            logger.info(f"💰 Porcentaje de capital configurado: {percentage}%")
+            logger.info("💰 Porcentaje de capital configurado: %s%%", percentage)
         else:
-            logger.error(f"❌ Error al configurar porcentaje de capital: {result.get('message')}")
+            logger.error("❌ Error al configurar porcentaje de capital: %s", result.get('message'))
     
     def set_position_check_interval(self, seconds: int):
         """
@@ -549,7 +831,7 @@ class CCXTHyperliquidBot:
             seconds = 10
         
         self.position_check_interval = seconds
-        logger.info(f"⏱️ Intervalo de seguimiento de posiciones configurado: {seconds} segundos")
+        logger.info("⏱️ Intervalo de seguimiento de posiciones configurado: %s segundos", seconds)
     
     def set_analysis_interval(self, seconds: int):
         """
@@ -563,7 +845,7 @@ class CCXTHyperliquidBot:
             seconds = 10
         
         self.analysis_interval = seconds
-        logger.info(f"⏱️ Intervalo de análisis técnico configurado: {seconds} segundos")
+        logger.info("⏱️ Intervalo de análisis técnico configurado: %s segundos", seconds)
 
 def main():
     """Función principal para ejecutar el bot."""
@@ -582,7 +864,7 @@ def main():
             bot.stop()
     
     except Exception as e:
-        logger.error(f"❌ Error al iniciar el bot: {str(e)}", exc_info=True)
+        logger.error("❌ Error al iniciar el bot: %s", e, exc_info=True)
 
 if __name__ == "__main__":
     main()
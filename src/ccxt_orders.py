@@ -4,14 +4,54 @@ Implementa la estrategia optimizada para BTC con gestión de capital y órdenes.
 CORREGIDO v4.8: Sincronización mejorada + Log de operaciones completo.
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
+import threading
 import time
-import json
-from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Tuple
 from datetime import datetime, timedelta
 
+try:
+    import orjson
+except ImportError:  # orjson es opcional; se usa json de la librería estándar
+    orjson = None
+
 logger = logging.getLogger("ccxt_orders")
 
+# Registros del log de operaciones que se agrupan antes de escribir, y cada cuánto
+# (segundos) se vuelcan igualmente para no retrasar el historial
+OPERATIONS_LOG_CAPACITY = 128
+OPERATIONS_LOG_FLUSH_INTERVAL = 2.0
+
+def _flush_periodically(handler: logging.Handler, interval: float) -> None:
+    """Vuelca el buffer de un handler cada `interval` segundos (hilo daemon)."""
+    while True:
+        time.sleep(interval)
+        handler.flush()
+
+# Intervalo mínimo (segundos) entre dos sincronizaciones con las posiciones reales
+POSITIONS_SYNC_TTL = 1.0
+
+# Con el bot en reposo (sin posiciones ni órdenes y sin cambios en la última
+# sincronización), intervalo máximo (segundos) sin volver a sincronizar
+IDLE_SYNC_INTERVAL = 30.0
+
+def _dumps_line(obj: Dict[str, Any]) -> str:
+    """Serializa un registro a JSON en una sola línea, con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+class PositionKey(NamedTuple):
+    """Clave de una posición activa en el registro del gestor de órdenes."""
+    asset: str
+    is_buy: bool
+    size: float  # Redondeado a 8 decimales para que coincidan tamaños equivalentes
+
 class CCXTOrderManager:
     """Clase para gestionar las órdenes del bot con estrategia optimizada para BTC usando CCXT."""
     
@@ -31,8 +71,15 @@ class CCXTOrderManager:
         self.capital_percentage = min(max(1, capital_percentage), 100)  # Asegurar que esté entre 1 y 100
         self.active_orders = {}  # Diccionario para seguimiento de órdenes activas
         self.active_positions = {}  # Diccionario para seguimiento de posiciones activas
+        self._positions_by_asset: Dict[str, Set[PositionKey]] = defaultdict(set)  # Índice activo -> claves de posición
         self.reserved_capital = 0.0  # Capital reservado para operaciones activas
         
+        # Instante monotónico de la última sincronización correcta con las posiciones reales
+        self._last_sync_ts = 0.0
+        
+        # True si las posiciones pueden haber cambiado desde la última sincronización
+        self._positions_dirty = True
+        
         # NUEVO: Configurar logger de operaciones
         self.setup_operations_logger()
         
@@ -57,25 +104,39 @@ class CCXTOrderManager:
         # Evitar duplicar handlers si ya existen
         if not self.operations_logger.handlers:
             # Handler para archivo de operaciones
-            operations_handler = logging.FileHandler(f"logs/operations_history_{timestamp}.log")
+            operations_file_handler = logging.FileHandler(f"logs/operations_history_{timestamp}.log")
+            operations_file_handler.setLevel(logging.INFO)
+            
+            # Formato específico para operaciones: un registro JSON por línea (NDJSON)
+            operations_formatter = logging.Formatter('%(message)s')
+            operations_file_handler.setFormatter(operations_formatter)
+            
+            # Agrupar las escrituras: se vuelca al llenarse, ante un ERROR, periódicamente y al salir
+            operations_handler = logging.handlers.MemoryHandler(
+                capacity=OPERATIONS_LOG_CAPACITY,
+                flushLevel=logging.ERROR,
+                target=operations_file_handler,
+                flushOnClose=True
+            )
             operations_handler.setLevel(logging.INFO)
-            
-            # Formato específico para operaciones
-            operations_formatter = logging.Formatter('%(asctime)s - %(message)s')
-            operations_handler.setFormatter(operations_formatter)
+            atexit.register(operations_handler.flush)
+            threading.Thread(
+                target=_flush_periodically,
+                args=(operations_handler, OPERATIONS_LOG_FLUSH_INTERVAL),
+                name="OperationsLogFlush",
+                daemon=True
+            ).start()
             
             self.operations_logger.addHandler(operations_handler)
             
             # Log inicial
-            self.operations_logger.info("=== HISTORIAL DE OPERACIONES INICIADO ===")
-            self.operations_logger.info("Formato: ACCION | Asset | Tipo | Tamaño | Precio | Capital | P/L | Razón")
-            self.operations_logger.info("=" * 80)
+            self.operations_logger.info(_dumps_line({"event": "log_started", "ts": time.time()}))
     
     def log_operation(self, action: str, asset: str, operation_type: str, size: float, 
                      price: float, capital: float, pnl_usd: float = 0, pnl_percent: float = 0, 
                      reason: str = "", entry_price: float = 0, duration: str = ""):
         """
-        Registra una operación en el log de historial.
+        Registra una operación en el log de historial como una línea JSON.
         NUEVO: Log completo de operaciones.
         
         Args:
@@ -91,29 +152,80 @@ class CCXTOrderManager:
             entry_price: Precio de entrada (solo para CLOSE)
             duration: Duración de la operación (solo para CLOSE)
         """
+        record = {
+            "ts": time.time(),
+            "action": action,
+            "asset": asset,
+            "type": operation_type,
+            "size": size,
+            "price": price,
+            "capital": capital
+        }
         if action == "OPEN":
-            message = (f"OPEN | {asset} | {operation_type} | {size:.6f} | "
-                      f"${price:.2f} | ${capital:.2f} | - | - | Señal detectada")
+            record["reason"] = "Señal detectada"
         else:  # CLOSE
-            pnl_sign = "+" if pnl_usd >= 0 else ""
-            message = (f"CLOSE | {asset} | {operation_type} | {size:.6f} | "
-                      f"${price:.2f} | ${capital:.2f} | {pnl_sign}${pnl_usd:.2f} | "
-                      f"{pnl_sign}{pnl_percent:.2f}% | {reason} | Entrada: ${entry_price:.2f} | {duration}")
+            record.update(
+                pnl_usd=pnl_usd,
+                pnl_percent=pnl_percent,
+                reason=reason,
+                entry_price=entry_price,
+                duration=duration
+            )
+        message = _dumps_line(record)
         
         self.operations_logger.info(message)
     
-    def sync_reserved_capital_with_real_positions(self) -> None:
+    def _add_position(self, position_key: PositionKey, position_data: Dict[str, Any]) -> None:
+        """
+        Registra una posición activa y la añade al índice por activo.
+        
+        Args:
+            position_key: Clave de la posición
+            position_data: Datos de la posición
+        """
+        self.active_positions[position_key] = position_data
+        self._positions_by_asset[position_data["asset"]].add(position_key)
+    
+    def _remove_position(self, position_key: PositionKey) -> Optional[Dict[str, Any]]:
+        """
+        Elimina una posición del registro y del índice por activo.
+        
+        Args:
+            position_key: Clave de la posición
+            
+        Returns:
+            Datos de la posición eliminada o None si no estaba registrada
+        """
+        position_data = self.active_positions.pop(position_key, None)
+        if position_data:
+            asset = position_data["asset"]
+            position_keys = self._positions_by_asset.get(asset)
+            if position_keys is not None:
+                position_keys.discard(position_key)
+                if not position_keys:
+                    del self._positions_by_asset[asset]
+        return position_data
+    
+    def sync_reserved_capital_with_real_positions(self, force: bool = False) -> None:
         """
         Sincroniza el capital reservado con las posiciones reales de la cuenta.
         MEJORADO: Limpieza más agresiva de posiciones obsoletas.
+        Si la última sincronización tiene menos de POSITIONS_SYNC_TTL no se repite.
+        
+        Args:
+            force: Sincronizar aunque la última sincronización sea reciente
         """
+        if not force and time.monotonic() - self._last_sync_ts < POSITIONS_SYNC_TTL:
+            return
+        
         try:
             # Obtener posiciones reales de la cuenta
-            real_positions = self.connection.exchange.fetch_positions()
+            real_positions = self.connection.get_positions()
             
             # Calcular capital realmente usado
             real_reserved_capital = 0.0
-            active_position_keys = []
+            active_position_keys = set()
+            positions_added = False
             
             for position in real_positions:
                 if position and position.get('contracts', 0) != 0:
@@ -130,34 +242,33 @@ class CCXTOrderManager:
                     real_reserved_capital += capital_used
                     
                     # Crear clave de posición
-                    position_key = f"{asset}_{is_buy}_{size}"
-                    active_position_keys.append(position_key)
+                    position_key = PositionKey(asset, is_buy, round(size, 8))
+                    active_position_keys.add(position_key)
                     
                     # Si no está en nuestro registro, añadirla
                     if position_key not in self.active_positions:
                         logger.warning(f"Posición real detectada no registrada: {asset} {'LONG' if is_buy else 'SHORT'} {size}")
-                        self.active_positions[position_key] = {
+                        positions_added = True
+                        self._add_position(position_key, {
                             "asset": asset,
                             "is_buy": is_buy,
                             "size": size,
                             "entry_price": entry_price,
                             "capital_used": capital_used,
                             "entry_time": datetime.now(),  # Aproximado
+                            "entry_time_monotonic": time.monotonic(),
                             "risk_levels": {}
-                        }
+                        })
             
             # MEJORADO: Eliminar TODAS las posiciones de nuestro registro que ya no existen
-            positions_to_remove = []
-            for position_key in list(self.active_positions.keys()):  # Usar list() para evitar modificar durante iteración
-                if position_key not in active_position_keys:
-                    position_data = self.active_positions[position_key]
-                    logger.info(f"Posición cerrada detectada: {position_data['asset']} {'LONG' if position_data['is_buy'] else 'SHORT'}")
-                    positions_to_remove.append(position_key)
+            # (diferencia de conjuntos: no modifica el registro mientras se calcula)
+            positions_to_remove = self.active_positions.keys() - active_position_keys
             
             # Eliminar posiciones obsoletas
             for position_key in positions_to_remove:
-                removed_position = self.active_positions.pop(position_key, None)
+                removed_position = self._remove_position(position_key)
                 if removed_position:
+                    logger.info(f"Posición cerrada detectada: {removed_position['asset']} {'LONG' if removed_position['is_buy'] else 'SHORT'}")
                     logger.info(f"Posición eliminada del registro: {position_key}")
             
             # Actualizar capital reservado
@@ -170,9 +281,12 @@ class CCXTOrderManager:
             # NUEVO: Log de estado de sincronización
             logger.debug(f"Sincronización completada: {len(self.active_positions)} posiciones activas, "
                         f"capital reservado: ${self.reserved_capital:.2f}")
+            self._last_sync_ts = time.monotonic()
+            self._positions_dirty = positions_added or bool(positions_to_remove)
             
         except Exception as e:
             logger.error(f"Error al sincronizar capital reservado: {str(e)}")
+            self._positions_dirty = True
     
     def has_active_position_for_asset(self, asset: str) -> bool:
         """
@@ -185,14 +299,16 @@ class CCXTOrderManager:
         Returns:
             True si hay posición activa, False si no
         """
-        # Sincronizar antes de verificar
-        self.sync_reserved_capital_with_real_positions()
+        # Sincronizar antes de verificar, salvo con el bot en reposo y sin cambios recientes
+        idle = not (self._positions_dirty or self.active_positions or self.active_orders)
+        if not idle or time.monotonic() - self._last_sync_ts >= IDLE_SYNC_INTERVAL:
+            self.sync_reserved_capital_with_real_positions()
         
-        # Verificar en registro interno
-        for position_key, position_data in self.active_positions.items():
-            if position_data["asset"] == asset:
-                logger.debug(f"Posición activa encontrada para {asset}: {position_key}")
-                return True
+        # Verificar en registro interno (índice por activo)
+        position_keys = self._positions_by_asset.get(asset)
+        if position_keys:
+            logger.debug(f"Posición activa encontrada para {asset}: {next(iter(position_keys))}")
+            return True
         
         logger.debug(f"No hay posiciones activas para {asset}")
         return False
@@ -275,7 +391,8 @@ class CCXTOrderManager:
             order_result = self.connection.place_market_order(
                 asset=asset,
                 is_buy=is_buy,
-                sz=position_size
+                sz=position_size,
+                price=float(market_data.get("midPrice", 0))
             )
             
             if order_result.get("status") != "ok":
@@ -319,16 +436,17 @@ class CCXTOrderManager:
             self.reserved_capital += capital_used
             
             # Registrar posición activa
-            position_key = f"{asset}_{is_buy}_{executed_size}"
-            self.active_positions[position_key] = {
+            position_key = PositionKey(asset, is_buy, round(executed_size, 8))
+            self._add_position(position_key, {
                 "asset": asset,
                 "is_buy": is_buy,
                 "size": executed_size,
                 "entry_price": executed_price,
                 "capital_used": capital_used,
                 "entry_time": datetime.now(),
+                "entry_time_monotonic": time.monotonic(),
                 "risk_levels": {}
-            }
+            })
             
             # Configurar niveles de riesgo
             risk_levels = self.risk_manager.set_risk_levels(
@@ -351,6 +469,10 @@ class CCXTOrderManager:
                 capital=capital_used
             )
             
+            # Las posiciones de la cuenta han cambiado
+            self._last_sync_ts = 0.0
+            self._positions_dirty = True
+            
             logger.info(f"Orden ejecutada: {asset}, {operation_type}, "
                        f"tamaño={executed_size}, precio={executed_price}, capital=${capital_used:.2f}")
             
@@ -371,6 +493,26 @@ class CCXTOrderManager:
                 "message": f"Error al ejecutar señal: {str(e)}"
             }
     
+    def _fetch_prices(self, assets: List[str]) -> Dict[str, float]:
+        """
+        Obtiene el precio actual (midPrice) de varios activos: varios activos en una
+        sola petición, y petición individual para un único activo o si faltó alguno.
+        
+        Args:
+            assets: Lista de activos sin repetir
+            
+        Returns:
+            Diccionario activo -> precio (solo activos con datos de mercado)
+        """
+        market_data_by_asset = self.connection.get_market_data_bulk(assets) if len(assets) > 1 else {}
+        
+        prices = {}
+        for asset in assets:
+            market_data = market_data_by_asset.get(asset) or self.connection.get_market_data(asset)
+            if market_data:
+                prices[asset] = float(market_data.get("midPrice", 0))
+        return prices
+    
     def check_positions(self) -> None:
         """
         Verifica las posiciones activas y ejecuta stop loss, take profit o trailing stop si es necesario.
@@ -385,6 +527,9 @@ class CCXTOrderManager:
             
             positions_to_close = []
             
+            # Precio actual de cada activo distinto, una sola vez por verificación
+            prices = self._fetch_prices(list(self._positions_by_asset))
+            
             for position_key, position_data in self.active_positions.items():
                 asset = position_data["asset"]
                 is_buy = position_data["is_buy"]
@@ -392,12 +537,11 @@ class CCXTOrderManager:
                 entry_price = position_data["entry_price"]
                 
                 # Obtener precio actual
-                market_data = self.connection.get_market_data(asset)
-                if not market_data:
+                current_price = prices.get(asset)
+                if current_price is None:
                     logger.warning(f"No se pudo obtener precio actual para {asset}")
                     continue
                 
-                current_price = float(market_data.get("midPrice", 0))
                 if current_price <= 0:
                     logger.warning(f"Precio actual inválido para {asset}: {current_price}")
                     continue
@@ -413,16 +557,133 @@ class CCXTOrderManager:
                 
                 if should_close:
                     logger.info(f"Cerrando posición {asset} {'LONG' if is_buy else 'SHORT'}: {reason}")
-                    positions_to_close.append((position_key, position_data, reason, current_price))
+                    positions_to_close.append((position_key, reason, current_price))
             
-            # Cerrar posiciones que alcanzaron niveles de riesgo
-            for position_key, position_data, reason, current_price in positions_to_close:
-                self.close_position(position_key, reason, current_price)
+            # Cerrar posiciones que alcanzaron niveles de riesgo (en paralelo si son varias)
+            if len(positions_to_close) == 1:
+                self.close_position(*positions_to_close[0])
+            elif positions_to_close:
+                self.close_positions(positions_to_close)
                 
         except Exception as e:
             logger.error(f"Error al verificar posiciones: {str(e)}", exc_info=True)
     
-    def close_position(self, position_key: str, reason: str = "Manual", current_price: float = 0) -> Dict[str, Any]:
+    def _prepare_close(self, position_key: PositionKey, current_price: float = 0) -> Tuple[Dict[str, Any], float]:
+        """
+        Prepara la orden de cierre (opuesta a la posición) de una posición registrada.
+        
+        Args:
+            position_key: Clave de la posición a cerrar
+            current_price: Precio actual (se consulta si no se proporciona)
+            
+        Returns:
+            Tupla (parámetros de place_market_order, precio para el P/L)
+        """
+        position_data = self.active_positions[position_key]
+        
+        # Obtener precio actual si no se proporcionó
+        if current_price <= 0:
+            market_data = self.connection.get_market_data(position_data["asset"])
+            current_price = float(market_data.get("midPrice", 0)) if market_data else 0.0
+        
+        # Sin precio en vivo, place_market_order obtiene el suyo (o falla): un límite
+        # IOC calculado sobre el precio de entrada podría no ejecutarse
+        order_params = {
+            "asset": position_data["asset"],
+            "is_buy": not position_data["is_buy"],  # Orden opuesta
+            "sz": position_data["size"],
+            "price": current_price if current_price > 0 else None
+        }
+        
+        # El precio de entrada solo sirve como respaldo para el cálculo de P/L
+        return order_params, current_price if current_price > 0 else position_data["entry_price"]
+    
+    def _finalize_close(self, position_key: PositionKey, reason: str, current_price: float,
+                        close_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Actualiza el registro y el log tras enviar la orden de cierre de una posición.
+        
+        Args:
+            position_key: Clave de la posición cerrada
+            reason: Razón del cierre
+            current_price: Precio usado para el cálculo de P/L
+            close_result: Respuesta de place_market_order
+            
+        Returns:
+            Resultado del cierre
+        """
+        if close_result.get("status") != "ok":
+            logger.error(f"Error al cerrar posición {position_key}: {close_result}")
+            return {
+                "status": "error",
+                "message": "Error al colocar orden de cierre",
+                "details": close_result
+            }
+        
+        position_data = self.active_positions[position_key]
+        asset = position_data["asset"]
+        is_buy = position_data["is_buy"]
+        size = position_data["size"]
+        entry_price = position_data["entry_price"]
+        capital_used = position_data["capital_used"]
+        
+        # Calcular P/L
+        if is_buy:
+            pnl_usd = (current_price - entry_price) * size
+            pnl_percent = ((current_price / entry_price) - 1) * 100
+        else:
+            pnl_usd = (entry_price - current_price) * size
+            pnl_percent = ((entry_price / current_price) - 1) * 100
+        
+        # Calcular duración (H:MM:SS) con el reloj monotónico
+        secs = int(time.monotonic() - position_data["entry_time_monotonic"])
+        duration = f"{secs // 3600}:{(secs % 3600) // 60:02d}:{secs % 60:02d}"
+        
+        # Actualizar capital reservado
+        self.reserved_capital -= capital_used
+        if self.reserved_capital < 0:
+            self.reserved_capital = 0
+        
+        # NUEVO: Log de operación cerrada
+        operation_type = "LONG" if is_buy else "SHORT"
+        self.log_operation(
+            action="CLOSE",
+            asset=asset,
+            operation_type=operation_type,
+            size=size,
+            price=current_price,
+            capital=capital_used,
+            pnl_usd=pnl_usd,
+            pnl_percent=pnl_percent,
+            reason=reason,
+            entry_price=entry_price,
+            duration=duration
+        )
+        
+        # Eliminar posición del registro
+        self._remove_position(position_key)
+        
+        # Eliminar niveles de riesgo
+        self.risk_manager.remove_risk_levels(asset, is_buy, size)
+        
+        # Las posiciones de la cuenta han cambiado
+        self._last_sync_ts = 0.0
+        self._positions_dirty = True
+        
+        logger.info(f"Posición cerrada exitosamente: {asset} {operation_type}, "
+                   f"razón: {reason}, P/L: ${pnl_usd:.2f} ({pnl_percent:.2f}%), "
+                   f"duración: {duration}, capital liberado: ${capital_used:.2f}")
+        
+        return {
+            "status": "ok",
+            "message": f"Posición cerrada: {reason}",
+            "capital_freed": capital_used,
+            "pnl_usd": pnl_usd,
+            "pnl_percent": pnl_percent,
+            "duration": duration
+        }
+    
+    def close_position(self, position_key: PositionKey, reason: str = "Manual", current_price: float = 0) -> Dict[str, Any]:
         """
         Cierra una posición específica.
         MEJORADO: Log completo de operación cerrada.
@@ -443,84 +704,9 @@ class CCXTOrderManager:
                     "message": "Posición no encontrada"
                 }
             
-            position_data = self.active_positions[position_key]
-            asset = position_data["asset"]
-            is_buy = position_data["is_buy"]
-            size = position_data["size"]
-            entry_price = position_data["entry_price"]
-            capital_used = position_data["capital_used"]
-            entry_time = position_data["entry_time"]
-            
-            # Obtener precio actual si no se proporcionó
-            if current_price <= 0:
-                market_data = self.connection.get_market_data(asset)
-                current_price = float(market_data.get("midPrice", 0)) if market_data else entry_price
-            
-            # Calcular P/L
-            if is_buy:
-                pnl_usd = (current_price - entry_price) * size
-                pnl_percent = ((current_price / entry_price) - 1) * 100
-            else:
-                pnl_usd = (entry_price - current_price) * size
-                pnl_percent = ((entry_price / current_price) - 1) * 100
-            
-            # Calcular duración
-            duration = str(datetime.now() - entry_time).split('.')[0]  # Sin microsegundos
-            
-            # Colocar orden de cierre (opuesta a la posición)
-            close_result = self.connection.place_market_order(
-                asset=asset,
-                is_buy=not is_buy,  # Orden opuesta
-                sz=size
-            )
-            
-            if close_result.get("status") == "ok":
-                # Actualizar capital reservado
-                self.reserved_capital -= capital_used
-                if self.reserved_capital < 0:
-                    self.reserved_capital = 0
-                
-                # NUEVO: Log de operación cerrada
-                operation_type = "LONG" if is_buy else "SHORT"
-                self.log_operation(
-                    action="CLOSE",
-                    asset=asset,
-                    operation_type=operation_type,
-                    size=size,
-                    price=current_price,
-                    capital=capital_used,
-                    pnl_usd=pnl_usd,
-                    pnl_percent=pnl_percent,
-                    reason=reason,
-                    entry_price=entry_price,
-                    duration=duration
-                )
-                
-                # Eliminar posición del registro
-                self.active_positions.pop(position_key, None)
-                
-                # Eliminar niveles de riesgo
-                self.risk_manager.remove_risk_levels(asset, is_buy, size)
-                
-                logger.info(f"Posición cerrada exitosamente: {asset} {operation_type}, "
-                           f"razón: {reason}, P/L: ${pnl_usd:.2f} ({pnl_percent:.2f}%), "
-                           f"duración: {duration}, capital liberado: ${capital_used:.2f}")
-                
-                return {
-                    "status": "ok",
-                    "message": f"Posición cerrada: {reason}",
-                    "capital_freed": capital_used,
-                    "pnl_usd": pnl_usd,
-                    "pnl_percent": pnl_percent,
-                    "duration": duration
-                }
-            else:
-                logger.error(f"Error al cerrar posición {position_key}: {close_result}")
-                return {
-                    "status": "error",
-                    "message": "Error al colocar orden de cierre",
-                    "details": close_result
-                }
+            order_params, current_price = self._prepare_close(position_key, current_price)
+            close_result = self.connection.place_market_order(**order_params)
+            return self._finalize_close(position_key, reason, current_price, close_result)
                 
         except Exception as e:
             logger.error(f"Error al cerrar posición {position_key}: {str(e)}", exc_info=True)
@@ -529,6 +715,49 @@ class CCXTOrderManager:
                 "message": f"Error al cerrar posición: {str(e)}"
             }
     
+    def close_positions(self, closes: List[Tuple[PositionKey, str, float]]) -> List[Dict[str, Any]]:
+        """
+        Cierra varias posiciones enviando todas las órdenes de cierre a la vez,
+        de modo que el tiempo total es el de una sola petición y no el de N.
+        
+        Args:
+            closes: Lista de (clave de posición, razón del cierre, precio actual)
+            
+        Returns:
+            Resultado del cierre de cada posición, en el mismo orden
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(closes)
+        prepared = []
+        
+        for i, (position_key, reason, current_price) in enumerate(closes):
+            if position_key not in self.active_positions:
+                logger.warning(f"Posición {position_key} no encontrada en posiciones activas")
+                results[i] = {"status": "error", "message": "Posición no encontrada"}
+                continue
+            try:
+                order_params, current_price = self._prepare_close(position_key, current_price)
+                prepared.append((i, position_key, reason, current_price, order_params))
+            except Exception as e:
+                logger.error(f"Error al preparar el cierre de {position_key}: {str(e)}", exc_info=True)
+                results[i] = {"status": "error", "message": f"Error al cerrar posición: {str(e)}"}
+        
+        if not prepared:
+            return results
+        
+        # Enviar todas las órdenes en paralelo (place_market_order gestiona sus propios errores)
+        with ThreadPoolExecutor(max_workers=len(prepared), thread_name_prefix="close_order") as pool:
+            close_results = list(pool.map(lambda p: self.connection.place_market_order(**p[4]), prepared))
+        
+        # Actualizar registro y log en orden, en este hilo
+        for (i, position_key, reason, current_price, _), close_result in zip(prepared, close_results):
+            try:
+                results[i] = self._finalize_close(position_key, reason, current_price, close_result)
+            except Exception as e:
+                logger.error(f"Error al cerrar posición {position_key}: {str(e)}", exc_info=True)
+                results[i] = {"status": "error", "message": f"Error al cerrar posición: {str(e)}"}
+        
+        return results
+    
     def get_available_capital(self) -> float:
         """
         Obtiene el capital disponible para nuevas operaciones.
@@ -539,16 +768,21 @@ class CCXTOrderManager:
         account_summary = self.get_account_summary()
         return account_summary["available_capital"]
     
-    def get_account_summary(self) -> Dict[str, Any]:
+    def get_account_summary(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Obtiene un resumen de la cuenta y el estado actual desde la API de Hyperliquid.
+        Las llamadas seguidas reutilizan la instantánea de cuenta de la conexión, que
+        se invalida al colocar o cancelar órdenes.
+        
+        Args:
+            force_refresh: Consultar la API aunque haya una instantánea reciente
         
         Returns:
             Diccionario con resumen de la cuenta
         """
         try:
             # Obtener resumen de cuenta desde CCXT
-            account_summary = self.connection.get_account_summary()
+            account_summary = self.connection.get_account_summary(force_refresh=force_refresh)
             
             # Obtener valores relevantes
             total_capital = account_summary.get("total_capital", 0)
@@ -3,10 +3,11 @@ Módulo de configuración para el bot de trading en Hyperliquid.
 Gestiona la carga y validación de parámetros de configuración.
 """
 
+import copy
 import json
 import os
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 # Configurar logging
 # Asegurar que el directorio de logs exista
@@ -25,6 +26,12 @@ logging.basicConfig(
 
 logger = logging.getLogger("config")
 
+# Secciones obligatorias del archivo de configuración
+REQUIRED_SECTIONS = ("general", "strategy", "technical_analysis", "auth")
+
+# Caché de configuraciones ya parseadas: ruta -> (mtime_ns, configuración)
+_config_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
 class Config:
     """Clase para gestionar la configuración del bot."""
     
@@ -82,18 +89,25 @@ class Config:
             Diccionario con la configuración
         """
         try:
+            # Reutilizar el contenido ya parseado si el archivo no ha cambiado
+            mtime_ns = os.stat(config_path).st_mtime_ns
+            cached = _config_cache.get(config_path)
+            if cached is not None and cached[0] == mtime_ns:
+                logger.info(f"Usando configuración en caché: {config_path}")
+                return copy.deepcopy(cached[1])
+            
             with open(config_path, 'r') as f:
                 config = json.load(f)
+            _config_cache[config_path] = (mtime_ns, config)
             logger.info(f"Archivo de configuración cargado: {config_path}")
-            return config
+            return copy.deepcopy(config)
         except Exception as e:
             logger.error(f"Error al cargar la configuración: {str(e)}")
             raise
     
     def _validate_config(self) -> None:
         """Valida que la configuración tenga todos los campos requeridos."""
-        required_sections = ["general", "strategy", "technical_analysis", "auth"]
-        for section in required_sections:
+        for section in REQUIRED_SECTIONS:
             if section not in self.config:
                 logger.error(f"Sección requerida no encontrada en la configuración: {section}")
                 raise ValueError(f"Sección requerida no encontrada en la configuración: {section}")
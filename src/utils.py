@@ -142,18 +142,22 @@ def save_trade_history(trade_data: Dict[str, Any], file_path: str) -> None:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
         # Cargar historial existente o crear nuevo
-        if os.path.exists(file_path):
+        try:
             with open(file_path, 'r') as f:
                 history = json.load(f)
-        else:
+        except FileNotFoundError:
             history = []
         
         # Añadir nueva operación
         history.append(trade_data)
         
-        # Guardar historial actualizado
-        with open(file_path, 'w') as f:
+        # Guardar historial actualizado de forma atómica (escritura temporal + rename)
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(history, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
         
         logger.info(f"Historial de operaciones actualizado: {file_path}")
     